@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from compressors import COMPRESSORS, available_compressors
+from freq_loader import load_database, load_freq_directory
+from match import CSV_HEADER, csv_row
+from ncd import SizeCache, ncd_row
+from results_format import RESULTS_FORMATS, results_path, write_results_parquet
+
+# Query and reference signatures of every score set, shared with the worker processes (set by init_worker)
+_sets = None
+
+def init_worker(sets):
+    global _sets
+    _sets = sets
+
+def score_block(name, compressor, start, stop, sizes):
+    """Worker: NCD rows of queries[start:stop] of a score set against all its references, and the seconds spent."""
+    begin = time.perf_counter()
+    queries, references = _sets[name]
+    block = np.empty((stop - start, len(references)))
+    for row, query in enumerate(queries[start:stop]):
+        block[row] = ncd_row(query, references, sizes, compressor)
+    return name, compressor, start, block, time.perf_counter() - begin
+
+def score_cells(name, compressor, rows, columns, sizes):
+    """Worker: NCDs of the given queries of a score set against the given references (sizes of those references)."""
+    queries, references = _sets[name]
+    selected = [references[j] for j in columns]
+    block = np.empty((len(rows), len(columns)))
+    for row, i in enumerate(rows):
+        block[row] = ncd_row(queries[i], selected, sizes, compressor)
+    return name, compressor, rows, columns, block
+
+def reference_sizes(references, compressor, cache_dir="../ncd_cache"):
+    """C(y) of every reference, through the persistent SizeCache."""
+    cache = SizeCache(compressor, cache_dir)
+    sizes = np.array([cache.size(data) for data in references], dtype=np.int64)
+    cache.save()
+    return sizes
+
+def score_grids(sets, compressors, workers=None, cache_dir="../ncd_cache", block_size=None, timings=None):
+    """
+    Query x reference NCD matrices of several score sets and compressors in
+    one process pool.
+
+    sets maps a name to (query signatures, reference signatures), e.g. the
+    identification queries against database/ and the genre queries against
+    database2/. They are sent once to each worker, C(y) comes from the
+    SizeCache, and the (set, compressor, block of queries) tasks are
+    submitted in the order of compressors. Returns {(name, compressor): matrix};
+    a timings dict is filled with the worker seconds of every matrix.
+    """
+    sets = {name: ([bytes(data) for data in queries], [bytes(data) for data in references])
+            for name, (queries, references) in sets.items()}
+    workers = workers or os.cpu_count()
+
+    matrices = {}
+    tasks = []
+    for compressor in compressors:
+        for name, (queries, references) in sets.items():
+            sizes = reference_sizes(references, compressor, cache_dir)
+            matrices[name, compressor] = np.empty((len(queries), len(references)))
+            step = block_size or max(1, len(queries) * len(compressors) // (workers * 4))
+            tasks += [(name, compressor, start, min(start + step, len(queries)), sizes)
+                      for start in range(0, len(queries), step)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(sets,)) as executor:
+        futures = [executor.submit(score_block, *task) for task in tasks]
+        for future in as_completed(futures):
+            name, compressor, start, block, elapsed = future.result()
+            matrices[name, compressor][start:start + len(block)] = block
+            if timings is not None:
+                timings[name, compressor] = timings.get((name, compressor), 0.0) + elapsed
+
+    return matrices
+
+def score_matrices(database, queries, compressors, workers=None, cache_dir="../ncd_cache", block_size=None):
+    """
+    Full query x database NCD matrix of every compressor, over a process
+    pool (see score_grids). Returns {compressor: matrix}.
+    """
+    sets = {'scores': ([data for _, data in queries], [data for _, data in database])}
+    matrices = score_grids(sets, compressors, workers, cache_dir, block_size)
+    return {compressor: matrices['scores', compressor] for compressor in compressors}
+
+def save_matrices(matrices, query_names, database_names, output_dir):
+    """
+    Write scores_<compressor>.npy (queries x database, float64) and
+    scores_index.json with the row (query) and column (database) names.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for compressor, matrix in matrices.items():
+        np.save(os.path.join(output_dir, f"scores_{compressor}.npy"), matrix)
+    with open(os.path.join(output_dir, "scores_index.json"), "w") as f:
+        json.dump({'queries': query_names, 'database': database_names}, f, indent=1)
+
+def load_matrices(output_dir, compressors=None):
+    """({compressor: matrix}, query names, database names) as written by save_matrices."""
+    with open(os.path.join(output_dir, "scores_index.json")) as f:
+        index = json.load(f)
+    matrices = {}
+    for compressor in compressors or COMPRESSORS:
+        path = os.path.join(output_dir, f"scores_{compressor}.npy")
+        if os.path.exists(path):
+            matrices[compressor] = np.load(path, mmap_mode='r')
+    return matrices, index['queries'], index['database']
+
+def write_results_csv(matrix, query_names, database_names, output_csv):
+    """Best-match CSV in the format of the match binary, from a score matrix."""
+    best = np.argmin(matrix, axis=1)
+    with open(output_csv, "w") as csv:
+        csv.write(CSV_HEADER)
+        for qname, row, j in zip(query_names, matrix, best):
+            csv.write(csv_row(qname, database_names[j], float(row[j])))
+
+def write_results(matrix, query_names, database_names, output):
+    """write_results_csv, or the typed Parquet table if output ends in .parquet."""
+    if output.endswith(".parquet"):
+        write_results_parquet(matrix, query_names, database_names, output)
+    else:
+        write_results_csv(matrix, query_names, database_names, output)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score every query against every database entry for several compressors.")
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--compressors", nargs="+", default=list(COMPRESSORS))
+    parser.add_argument("--output-dir", default="../results/scores", help="where the .npy matrices are written")
+    parser.add_argument("--csv-dir", default=None, help="also write results_<compressor>.<format> here")
+    parser.add_argument("--format", choices=RESULTS_FORMATS, default="csv", help="format of the --csv-dir results")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    args = parser.parse_args()
+
+    compressors = available_compressors(args.compressors)
+    missing = set(args.compressors) - set(compressors)
+    if missing:
+        print(f"Skipping compressors without Python bindings: {', '.join(sorted(missing))}")
+
+    database = load_database(args.db)
+    queries = load_freq_directory(args.queries)
+    query_names = [name for name, _ in queries]
+    database_names = [name for name, _ in database]
+
+    start = time.perf_counter()
+    matrices = score_matrices(database, queries, compressors, args.workers, args.cache_dir)
+    elapsed = time.perf_counter() - start
+    total = len(queries) * len(database) * len(compressors)
+    print(f"{total} NCDs ({len(queries)} queries x {len(database)} songs x {len(compressors)} compressors) "
+          f"in {elapsed:.2f}s ({total / elapsed:.0f} NCD/s)")
+
+    save_matrices(matrices, query_names, database_names, args.output_dir)
+    print(f"Score matrices saved to {args.output_dir}")
+
+    if args.csv_dir:
+        os.makedirs(args.csv_dir, exist_ok=True)
+        for compressor, matrix in matrices.items():
+            write_results(matrix, query_names, database_names, results_path(args.csv_dir, compressor, args.format))
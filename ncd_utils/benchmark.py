@@ -0,0 +1,96 @@
+import os
+import time
+import argparse
+
+import numpy as np
+
+from compressors import COMPRESSORS, DEFAULT_LEVELS, LEVEL_RANGES, available_compressors, compress_size, valid_level
+from freq_loader import load_database, load_freq_directory
+from ncd import ncd_row
+from query_names import original_filename
+
+# Levels swept for every compressor; each tuple contains the DEFAULT_LEVELS value, the one of src/utils.cpp
+BENCHMARK_LEVELS = {
+    'gzip': (1, 6, 9),
+    'bzip2': (1, 5, 9),
+    'zstd': (1, 3, 9, 19),
+    'lzma': (0, 6, 9),
+    'lzo': (1, 9),
+    'snappy': (None,),
+    'lz4': (0, 9),
+}
+
+BENCHMARK_CSV_HEADER = "compressor,level,compress MB/s,NCD/s,p50 ms,p99 ms,accuracy\n"
+
+def benchmark(compressor, level, database, queries):
+    """
+    {metric: value} of one compressor and level: compression throughput over
+    all signatures, NCDs per second and per-query latency percentiles of a
+    full scan (C(y) computed beforehand), and barplot.py accuracy.
+    """
+    signatures = [data for _, data in database]
+    names = [name for name, _ in database]
+
+    start = time.perf_counter()
+    sizes = np.array([compress_size(data, compressor, level) for data in signatures], dtype=np.int64)
+    for _, query in queries:
+        compress_size(query, compressor, level)
+    elapsed = time.perf_counter() - start
+    total_bytes = sum(len(data) for data in signatures) + sum(len(query) for _, query in queries)
+
+    latencies = np.empty(len(queries))
+    correct = 0
+    for i, (qname, query) in enumerate(queries):
+        start = time.perf_counter()
+        ncds = ncd_row(query, signatures, sizes, compressor, level)
+        latencies[i] = time.perf_counter() - start
+        correct += names[int(np.argmin(ncds))] == original_filename(qname)
+
+    return {
+        'compress MB/s': total_bytes / elapsed / 1e6,
+        'NCD/s': len(queries) * len(signatures) / latencies.sum(),
+        'p50 ms': np.percentile(latencies, 50) * 1000,
+        'p99 ms': np.percentile(latencies, 99) * 1000,
+        'accuracy': correct / len(queries) * 100 if queries else 0.0,
+    }
+
+def format_row(compressor, level, metrics):
+    return (f"{compressor},{'-' if level is None else level},{metrics['compress MB/s']:.2f},{metrics['NCD/s']:.0f},"
+            f"{metrics['p50 ms']:.2f},{metrics['p99 ms']:.2f},{metrics['accuracy']:.2f}\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speed and accuracy of every compressor and level on the .freqs data.")
+    parser.add_argument("--compressors", nargs="+", default=list(COMPRESSORS))
+    parser.add_argument("--levels", type=int, nargs="+", default=None, help="levels to test (default: BENCHMARK_LEVELS)")
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--output", default="../results/benchmark.csv", help="output CSV")
+    args = parser.parse_args()
+
+    compressors = available_compressors(args.compressors)
+    missing = set(args.compressors) - set(compressors)
+    if missing:
+        print(f"Skipping compressors without Python bindings: {', '.join(sorted(missing))}")
+
+    database = load_database(args.db)
+    queries = load_freq_directory(args.queries)
+    print(f"{len(queries)} queries x {len(database)} songs; level {', '.join(f'{c} {DEFAULT_LEVELS[c]}' for c in compressors)} "
+          "is the one of the match binary")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as csv:
+        csv.write(BENCHMARK_CSV_HEADER)
+        print(BENCHMARK_CSV_HEADER, end="")
+        for compressor in compressors:
+            levels = BENCHMARK_LEVELS[compressor] if args.levels is None or compressor == 'snappy' else args.levels
+            invalid = [level for level in levels if not valid_level(compressor, level)]
+            if invalid:
+                low, high = LEVEL_RANGES[compressor]
+                print(f"Skipping {compressor} levels {', '.join(map(str, invalid))} (valid: {low} to {high})")
+            for level in levels:
+                if level in invalid:
+                    continue
+                row = format_row(compressor, level, benchmark(compressor, level, database, queries))
+                csv.write(row)
+                print(row, end="", flush=True)
+    print(f"Benchmark saved to {args.output}")
@@ -0,0 +1,125 @@
+import bz2
+import lzma
+import zlib
+
+# Same compressors and settings as src/utils.cpp. zstd, lzo, snappy and lz4
+# need their Python bindings (zstandard, python-lzo, python-snappy, lz4) and
+# are only imported when used.
+COMPRESSORS = ('gzip', 'bzip2', 'zstd', 'lzma', 'lzo', 'snappy', 'lz4')
+
+# Alternative names accepted for the compressors (e.g. results_zlib.csv)
+ALIASES = {'zlib': 'gzip', 'bz2': 'bzip2', 'xz': 'lzma'}
+
+# Level used by src/utils.cpp for every compressor (level=None below). lzo:
+# 1 is lzo1x_1, anything else lzo1x_999; lz4: 0 is LZ4_compress_default,
+# higher levels use LZ4 HC; snappy has no levels.
+DEFAULT_LEVELS = {'gzip': 6, 'bzip2': 9, 'zstd': 3, 'lzma': 6, 'lzo': 1, 'snappy': None, 'lz4': 0}
+
+# (lowest, highest) level accepted by the Python bindings; snappy has none
+LEVEL_RANGES = {'gzip': (0, 9), 'bzip2': (1, 9), 'zstd': (1, 22), 'lzma': (0, 9), 'lzo': (1, 9), 'snappy': None,
+                'lz4': (0, 12)}
+
+def valid_level(compressor, level):
+    """True if level can be passed to the compressor (None, the default level, always can)."""
+    if level is None:
+        return True
+    level_range = LEVEL_RANGES[compressor_from_string(compressor)]
+    return level_range is not None and level_range[0] <= level <= level_range[1]
+
+def compress_zlib(data, level=None):
+    # compress() with Z_DEFAULT_COMPRESSION (6)
+    return zlib.compress(data, -1 if level is None else level)
+
+def compress_bzip2(data, level=None):
+    # BZ2_bzBuffToBuffCompress with blockSize100k = 9, workFactor = 30
+    return bz2.compress(data, 9 if level is None else level)
+
+def compress_zstd(data, level=None):
+    import zstandard
+    return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+
+def compress_lzma(data, level=None):
+    # Raw LZMA2 data of lzma_easy_buffer_encode(6, LZMA_CHECK_CRC64); see lzma_size for the container
+    preset = 6 if level is None else level
+    return lzma.compress(data, format=lzma.FORMAT_RAW, filters=[{'id': lzma.FILTER_LZMA2, 'preset': preset}])
+
+def _vli_size(value):
+    size = 1
+    while value >= 0x80:
+        value >>= 7
+        size += 1
+    return size
+
+def lzma_size(data, level=None):
+    """
+    Size of the .xz stream written by lzma_easy_buffer_encode(6, LZMA_CHECK_CRC64)
+    (or another preset given as level).
+
+    Python only exposes the streaming encoder, whose block header omits the
+    compressed and uncompressed sizes that the buffer encoder stores, so the
+    container is rebuilt around the raw LZMA2 data to get the same size.
+    """
+    raw = len(compress_lzma(data, level))
+    uncompressed = len(data)
+    # Header size byte, flags, both sizes and the LZMA2 filter flags, padded to 4, then CRC32
+    block_header = -(-(2 + _vli_size(raw) + _vli_size(uncompressed) + 3) // 4) * 4 + 4
+    unpadded = block_header + raw + 8  # CRC64 check
+    block = unpadded + (-raw % 4)
+    index = 1 + _vli_size(1) + _vli_size(unpadded) + _vli_size(uncompressed)
+    index = -(-index // 4) * 4 + 4
+    return 12 + block + index + 12  # stream header and footer
+
+def compress_lzo(data, level=None):
+    import lzo
+    # lzo1x_1_compress without the python-lzo header
+    return lzo.compress(data, 1 if level is None else level, False)
+
+def compress_snappy(data, level=None):
+    import snappy
+    # snappy::RawCompress (raw format, not framed)
+    return snappy.compress(data)
+
+def compress_lz4(data, level=None):
+    import lz4.block
+    # LZ4_compress_default without the size prefix
+    if not level:
+        return lz4.block.compress(data, mode='default', store_size=False)
+    return lz4.block.compress(data, mode='high_compression', compression=level, store_size=False)
+
+COMPRESS_FUNCTIONS = {
+    'gzip': compress_zlib,
+    'bzip2': compress_bzip2,
+    'zstd': compress_zstd,
+    'lzma': compress_lzma,
+    'lzo': compress_lzo,
+    'snappy': compress_snappy,
+    'lz4': compress_lz4,
+}
+
+def compressor_from_string(name):
+    """Canonical compressor name, as accepted by the match binary."""
+    name = ALIASES.get(name, name)
+    if name not in COMPRESS_FUNCTIONS:
+        raise ValueError(f"Unknown compressor name: {name}")
+    return name
+
+def compress_size(data, compressor, level=None):
+    """
+    Compressed size of data (any bytes-like object) in bytes, as compress_size
+    in src/utils.cpp; level overrides the level of the compressor.
+    """
+    compressor = compressor_from_string(compressor)
+    if compressor == 'lzma':
+        return lzma_size(data, level)
+    return len(COMPRESS_FUNCTIONS[compressor](data, level))
+
+def available_compressors(compressors=COMPRESSORS):
+    """Compressors of the list whose Python bindings are installed."""
+    available = []
+    for compressor in compressors:
+        try:
+            compress_size(b"\0", compressor)
+        except ImportError:
+            continue
+        available.append(compressor_from_string(compressor))
+    return available
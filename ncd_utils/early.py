@@ -0,0 +1,173 @@
+import time
+import zlib
+import argparse
+
+import numpy as np
+
+from compressors import compress_size, compressor_from_string
+from freq_loader import load_database, load_freq_directory
+from ncd import NCDMatcher, compute_ncd_from_sizes
+from prefilter import CandidateIndex
+
+# Compressors the search supports. bzip2, lz4 and zstd sometimes compress
+# x + y[:k] to more bytes than x + y, which prunes the true best match far
+# more often, and they have no stream to continue from a checkpoint
+EARLY_COMPRESSORS = ('gzip',)
+
+# Bytes a Z_SYNC_FLUSH adds (empty stored block: header bits, padding and
+# LEN/NLEN), taken off the checkpoint sizes
+SYNC_FLUSH_BYTES = 5
+
+# Candidates probed before the pruning rate decides whether probing pays
+# off, and how often a candidate is probed anyway to keep the rate current
+PROBE_WARMUP = 32
+PROBE_EVERY = 16
+
+def gzip_checkpoint_sizes(state, prefix_size, data, fractions):
+    """
+    Estimates of C(x + data[:k]) at the given fractions of data, from one
+    copy of a zlib stream that has already consumed x. Every checkpoint ends
+    the current block with Z_SYNC_FLUSH, so the data is compressed once and
+    no block is written twice; the bytes of the flush markers are taken off,
+    but the split blocks still make these sizes differ slightly from
+    one-shot compression.
+    """
+    state = state.copy()
+    done = 0
+    for flushes, fraction in enumerate(fractions, 1):
+        k = int(len(data) * fraction)
+        prefix_size += len(state.compress(data[done:k])) + len(state.flush(zlib.Z_SYNC_FLUSH))
+        done = k
+        yield prefix_size - flushes * SYNC_FLUSH_BYTES
+
+def gzip_exact_size(state, prefix_size, data):
+    """Exact C(xy) (same bytes as compressing x + data at once) from a copy of a zlib stream that has consumed x."""
+    state = state.copy()
+    return prefix_size + len(state.compress(data)) + len(state.flush())
+
+class EarlyStopMatcher(NCDMatcher):
+    """
+    Heuristic top-1 search that stops compressing a candidate once it is
+    unlikely to beat the best NCD found so far (gzip only).
+
+    At `fractions` of y, the size of x + y[:k] (see gzip_checkpoint_sizes)
+    together with max(C(x), C(y)) is taken as a lower bound of C(xy), and
+    the candidate is dropped if the NCD it implies is already worse than the
+    best one. deflate does not guarantee the bound, so the true best match
+    can be pruned; early.py reports how often the result differs from the
+    full scan. Candidates that reach the end get their exact C(xy), so the
+    reported NCDs are those of the full scan. Candidates are visited
+    best-first by the frame-token index so a good match is found early.
+
+    A candidate that is not pruned costs its checkpoints on top of the exact
+    C(xy), so once the share of pruned candidates falls below the last
+    fraction (e.g. against whole songs, where nothing is pruned) most
+    candidates go straight to the exact size; every PROBE_EVERY-th one is
+    still probed to follow the rate.
+    """
+
+    def __init__(self, database, compressor, cache_dir="../ncd_cache", fractions=(0.75, 0.9), ordered=True):
+        compressor = compressor_from_string(compressor)
+        if compressor not in EARLY_COMPRESSORS:
+            raise ValueError(f"Early termination is not available for {compressor} (only {', '.join(EARLY_COMPRESSORS)})")
+        super().__init__(database, compressor, cache_dir)
+        self.fractions = sorted(fractions)
+        self.index = CandidateIndex(database) if ordered else None
+        self.visited = 0
+        self.probed = 0
+        self.pruned = 0
+
+    def should_probe(self):
+        """True if the next candidate goes through the checkpoints (see the class docstring)."""
+        self.visited += 1
+        if not self.fractions:
+            return False
+        return (self.probed < PROBE_WARMUP or self.visited % PROBE_EVERY == 0
+                or self.pruned > self.probed * self.fractions[-1])
+
+    def search(self, query):
+        """
+        (best index, best NCD, number of pruned candidates, bytes compressed
+        relative to the full scan, which compresses every y once).
+        """
+        cx = compress_size(query, self.compressor)
+        order = range(len(self.signatures)) if self.index is None else np.argsort(-self.index.scores(query), kind='stable')
+        state = zlib.compressobj()
+        prefix_size = len(state.compress(query))
+
+        best, best_ncd = -1, np.inf
+        pruned = 0
+        compressed = 0
+        for i in order:
+            i = int(i)
+            data, cy = self.signatures[i], int(self.sizes[i])
+            survived = True
+            if self.should_probe():
+                self.probed += 1
+                for fraction, cxy in zip(self.fractions, gzip_checkpoint_sizes(state, prefix_size, data, self.fractions)):
+                    ncd = compute_ncd_from_sizes(cx, cy, max(cxy, cx, cy))
+                    # Ties go to the first entry in database order, like main.cpp
+                    if ncd > best_ncd or (ncd == best_ncd and i > best):
+                        survived = False
+                        break
+                compressed += int(len(data) * fraction)
+                self.pruned += not survived
+
+            if not survived:
+                pruned += 1
+                continue
+            compressed += len(data)
+            ncd = compute_ncd_from_sizes(cx, cy, gzip_exact_size(state, prefix_size, data))
+            if ncd < best_ncd or (ncd == best_ncd and i < best):
+                best, best_ncd = i, ncd
+
+        total = sum(len(data) for data in self.signatures)
+        return best, float(best_ncd), pruned, compressed / total if total else 0.0
+
+    def best_match(self, query, candidates=None):
+        if candidates is not None:
+            return super().best_match(query, candidates)
+        best, best_ncd, _, _ = self.search(query)
+        return self.names[best], best_ncd
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Early-termination top-1 search: pruning report against the full scan.")
+    parser.add_argument("--compressor", default="gzip", choices=EARLY_COMPRESSORS)
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--fractions", type=float, nargs="*", default=[0.75, 0.9], help="prefixes of y where the bound is checked")
+    parser.add_argument("--unordered", action="store_true", help="visit candidates in database order")
+    parser.add_argument("--window", type=float, default=None, help="search windows of this many seconds instead of whole songs")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    args = parser.parse_args()
+
+    database = load_database(args.db)
+    queries = load_freq_directory(args.queries)
+    if args.window:
+        from windowed import seconds_to_frames, split_windows
+        window = seconds_to_frames(args.window)
+        database = [(f"{database[song][0]}@{start}", data)
+                    for song, start, data in split_windows(database, window, max(1, window // 2))]
+
+    full = NCDMatcher(database, args.compressor, args.cache_dir)
+    early = EarlyStopMatcher(database, args.compressor, args.cache_dir, args.fractions, not args.unordered)
+
+    start = time.perf_counter()
+    expected = [full.best_match(query) for _, query in queries]
+    full_time = time.perf_counter() - start
+
+    print("music query,pruned,compressed fraction,same result")
+    start = time.perf_counter()
+    results = [early.search(query) for _, query in queries]
+    early_time = time.perf_counter() - start
+
+    differ = 0
+    for (qname, _), (best, best_ncd, pruned, fraction), (name, ncd) in zip(queries, results, expected):
+        same = early.names[best] == name and best_ncd == ncd
+        differ += not same
+        print(f"{qname},{pruned}/{len(database)},{fraction:.3f},{'true' if same else 'false'}")
+
+    pruned = np.array([result[2] for result in results])
+    print(f"Pruned {pruned.mean():.1f} of {len(database)} candidates per query on average; "
+          f"{full_time:.2f}s full scan, {early_time:.2f}s with early termination")
+    print(f"{differ} of {len(queries)} best matches differ from the full scan")
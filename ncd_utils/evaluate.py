@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import argparse
+
+from batch_score import save_matrices, score_grids, write_results
+from compressors import COMPRESSORS, available_compressors, compressor_from_string
+from freq_loader import load_database, load_freq_directory
+from genre import GENRE_METHODS, GenreScorer, load_genre_database, write_genre_csv
+from results_format import RESULTS_FORMATS, results_path
+
+# Slowest compressors first, so their tasks do not start last and the run
+# takes about as long as the slowest compressor alone
+COST_ORDER = ('lzma', 'bzip2', 'gzip', 'zstd', 'lzo', 'lz4', 'snappy')
+
+def evaluate(compressors, database, queries, genre_db, genre_queries, results_dir="../results", workers=None,
+             cache_dir="../ncd_cache", genre_method='mean', k=5, scores_dir=None, fmt='csv'):
+    """
+    Identification and genre results of every compressor in a single run.
+
+    All signatures are loaded by the caller once; every (compressor, task,
+    block of queries) is scored in one shared process pool and the same CSVs
+    as run_all_compressors.sh and run_all_compressor_genre.sh are written:
+    results_<compressor>.csv (or .parquet with fmt='parquet') and
+    genre/results_genre_<compressor>.csv. Compressors without Python bindings
+    are left out, and a ValueError is raised if none is left.
+    """
+    compressors = available_compressors(compressors)
+    if not compressors:
+        raise ValueError("No compressor with Python bindings to evaluate")
+    compressors = sorted(compressors, key=lambda c: COST_ORDER.index(c) if c in COST_ORDER else len(COST_ORDER))
+    sets = {}
+    if queries:
+        sets['identification'] = ([data for _, data in queries], [data for _, data in database])
+    if genre_queries:
+        scorers = {c: GenreScorer(genre_db, c, cache_dir, genre_method, k) for c in compressors}
+        sets['genre'] = ([data for _, data in genre_queries], scorers[compressors[0]].references)
+    matrices = score_grids(sets, compressors, workers, cache_dir)
+
+    query_names = [name for name, _ in queries]
+    database_names = [name for name, _ in database]
+    genre_query_names = [name for name, _ in genre_queries]
+    os.makedirs(os.path.join(results_dir, "genre"), exist_ok=True)
+    for compressor in compressors:
+        if queries:
+            write_results(matrices['identification', compressor], query_names, database_names,
+                          results_path(results_dir, compressor, fmt))
+        if genre_queries:
+            scorer = scorers[compressor]
+            results = [scorer.classify_ncds(row) for row in matrices['genre', compressor]]
+            write_genre_csv(os.path.join(results_dir, "genre", f"results_genre_{compressor}.csv"),
+                            scorer.genres, genre_query_names, results)
+
+    if scores_dir and queries:
+        save_matrices({c: matrices['identification', c] for c in compressors}, query_names, database_names, scores_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Identification and genre evaluation of all compressors in one run.")
+    parser.add_argument("--compressors", nargs="+", default=list(COMPRESSORS))
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--genre-db", default="../database2/", help="one folder of .freqs references per genre")
+    parser.add_argument("--genre-queries", default="../queries_genre/", help="folder of genre query .freqs files")
+    parser.add_argument("--results-dir", default="../results", help="where the CSVs are written")
+    parser.add_argument("--format", choices=RESULTS_FORMATS, default="csv", help="format of the identification results")
+    parser.add_argument("--scores-dir", default=None, help="also save the identification score matrices here")
+    parser.add_argument("--no-genre", action="store_true", help="only run the identification")
+    parser.add_argument("--method", choices=GENRE_METHODS, default="mean", help="genre classification method")
+    parser.add_argument("-k", type=int, default=5, help="neighbours of the k-NN genre vote")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    args = parser.parse_args()
+
+    compressors = available_compressors(args.compressors)
+    missing = {compressor_from_string(c) for c in args.compressors} - set(compressors)
+    if missing:
+        print(f"Skipping compressors without Python bindings: {', '.join(sorted(missing))}")
+    if not compressors:
+        print(f"None of the compressors ({', '.join(args.compressors)}) has Python bindings installed.")
+        sys.exit(1)
+
+    database = load_database(args.db)
+    queries = load_freq_directory(args.queries)
+    genre_db = {} if args.no_genre else load_genre_database(args.genre_db)
+    genre_queries = [] if args.no_genre else load_freq_directory(args.genre_queries)
+
+    start = time.perf_counter()
+    evaluate(compressors, database, queries, genre_db, genre_queries, args.results_dir, args.workers,
+             args.cache_dir, args.method, args.k, args.scores_dir, args.format)
+    print(f"{len(compressors)} compressors, {len(queries)} queries x {len(database)} songs and "
+          f"{len(genre_queries)} genre queries x {len(genre_db)} genres in {time.perf_counter() - start:.2f}s; "
+          f"results saved to {args.results_dir}")
@@ -0,0 +1,140 @@
+import os
+import sys
+import numpy as np
+
+# Packed database layout, shared with src/freq_loader.cpp (little-endian):
+#   header  magic "FREQSDB\0", uint32 version, uint32 count, uint64 names_offset, uint64 data_offset
+#   index   count x {uint64 name_offset, uint32 name_length, uint32 reserved, uint64 data_offset, uint64 data_length}
+#   names   UTF-8 file names, back to back (offsets relative to names_offset)
+#   data    signatures, back to back (offsets relative to data_offset)
+PACKED_MAGIC = b"FREQSDB\0"
+PACKED_VERSION = 1
+DATA_ALIGNMENT = 64
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('count', '<u4'),
+    ('names_offset', '<u8'),
+    ('data_offset', '<u8'),
+])
+
+INDEX_DTYPE = np.dtype([
+    ('name_offset', '<u8'),
+    ('name_length', '<u4'),
+    ('reserved', '<u4'),
+    ('data_offset', '<u8'),
+    ('data_length', '<u8'),
+])
+
+def load_freq_file(path):
+    """Raw bytes of a .freqs file."""
+    with open(path, "rb") as f:
+        return f.read()
+
+def load_freq_directory(directory):
+    """List of (file name, bytes) for every .freqs file of directory, sorted by name."""
+    return [
+        (filename, load_freq_file(os.path.join(directory, filename)))
+        for filename in sorted(os.listdir(directory))
+        if filename.endswith(".freqs")
+    ]
+
+def write_packed_database(entries, path):
+    """Write (name, signature bytes) pairs as a single packed database file."""
+    names = [name.encode("utf-8") for name, _ in entries]
+    count = len(entries)
+
+    index = np.zeros(count, dtype=INDEX_DTYPE)
+    name_offset = 0
+    data_offset = 0
+    for i, ((_, data), name) in enumerate(zip(entries, names)):
+        index[i] = (name_offset, len(name), 0, data_offset, len(data))
+        name_offset += len(name)
+        data_offset += len(data)
+
+    names_start = HEADER_DTYPE.itemsize + index.nbytes
+    data_start = -(-(names_start + name_offset) // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+    header = np.array([(PACKED_MAGIC, PACKED_VERSION, count, names_start, data_start)], dtype=HEADER_DTYPE)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(index.tobytes())
+        for name in names:
+            f.write(name)
+        f.write(b"\0" * (data_start - names_start - name_offset))
+        for _, data in entries:
+            f.write(data)
+    os.replace(tmp_path, path)
+
+def pack_directory(directory, path):
+    """Pack every .freqs file of directory (e.g. database/) into path. Returns the number of entries."""
+    entries = load_freq_directory(directory)
+    write_packed_database(entries, path)
+    return len(entries)
+
+def is_packed_database(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(PACKED_MAGIC)) == PACKED_MAGIC
+
+class PackedDatabase:
+    """
+    Read-only view of a packed database through numpy.memmap.
+
+    Opening only parses the header, the index and the names; signatures are
+    uint8 memmap slices that are read from disk on first access.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.buffer = np.memmap(path, dtype=np.uint8, mode='r')
+
+        header = self.buffer[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header['magic'] != PACKED_MAGIC.rstrip(b"\0") or header['version'] != PACKED_VERSION:
+            raise ValueError(f"Unsupported packed database: {path}")
+
+        count = int(header['count'])
+        self.names_offset = int(header['names_offset'])
+        self.data_offset = int(header['data_offset'])
+        index_end = HEADER_DTYPE.itemsize + count * INDEX_DTYPE.itemsize
+        self.index = self.buffer[HEADER_DTYPE.itemsize:index_end].view(INDEX_DTYPE)
+
+        names_blob = bytes(self.buffer[self.names_offset:self.data_offset])
+        self.names = [
+            names_blob[offset:offset + length].decode("utf-8")
+            for offset, length in zip(self.index['name_offset'].tolist(), self.index['name_length'].tolist())
+        ]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        entry = self.index[i]
+        start = self.data_offset + int(entry['data_offset'])
+        return self.buffer[start:start + int(entry['data_length'])]
+
+    def items(self):
+        """(name, signature) pairs, with signatures as memmap slices."""
+        for i, name in enumerate(self.names):
+            yield name, self[i]
+
+def load_database(path):
+    """
+    List of (name, signature) pairs from a folder of .freqs files or a packed
+    database file, the same two sources the match binary accepts with --db.
+    """
+    if is_packed_database(path):
+        return list(PackedDatabase(path).items())
+    return load_freq_directory(path)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 freq_loader.py <freqs_dir> <packed_db>")
+        sys.exit(1)
+
+    n = pack_directory(sys.argv[1], sys.argv[2])
+    print(f"Packed {n} signatures into {sys.argv[2]}")
@@ -0,0 +1,150 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from freq_loader import load_freq_directory
+from match import format_ncd
+from ncd import SizeCache, ncd_row
+from compressors import compressor_from_string
+
+GENRE_CSV_HEADER = "music query,identified genre,confidence,expected genre,correct"
+
+# Average NCD to the references of each genre, or a vote of the k nearest references
+GENRE_METHODS = ('mean', 'knn')
+
+def load_genre_database(base_dir):
+    """{genre: [(file name, bytes), ...]} from the sub-folders of base_dir (e.g. database2/), sorted by genre."""
+    genres = {}
+    for genre in sorted(os.listdir(base_dir)):
+        genre_dir = os.path.join(base_dir, genre)
+        if os.path.isdir(genre_dir):
+            references = load_freq_directory(genre_dir)
+            if references:
+                genres[genre] = references
+    return genres
+
+def expected_genre(qname):
+    """Genre prefix of a query name (before the first '_'), as in main.cpp."""
+    return qname.split("_", 1)[0] if "_" in qname else "unknown"
+
+class GenreScorer:
+    """
+    Genre of a query from its NCD to the references of every genre.
+
+    Every reference is compressed on its own once per compressor (and kept
+    in the SizeCache), and each query is compared with each reference once.
+    A genre can have any number of references (e.g. one per song). With
+    method='mean' the genre with the lowest average NCD wins, like
+    identify_genre in main.cpp; with method='knn' the k nearest references
+    vote.
+    """
+
+    def __init__(self, genre_db, compressor, cache_dir="../ncd_cache", method='mean', k=5):
+        if method not in GENRE_METHODS:
+            raise ValueError(f"Unknown genre method: {method}")
+        self.method = method
+        self.k = k
+        self.compressor = compressor_from_string(compressor)
+        self.genres = sorted(genre_db)
+        self.references = [data for genre in self.genres for _, data in genre_db[genre]]
+        self.genre_of = np.repeat(np.arange(len(self.genres)), [len(genre_db[genre]) for genre in self.genres])
+
+        cache = SizeCache(self.compressor, cache_dir)
+        self.sizes = np.array([cache.size(data) for data in self.references], dtype=np.int64)
+        cache.save()
+
+    def mean_scores(self, ncds):
+        """Average NCD to every genre, in self.genres order, from the NCDs to the references."""
+        return np.bincount(self.genre_of, weights=ncds) / np.bincount(self.genre_of)
+
+    def scores(self, query):
+        """Average NCD of the query to every genre, in self.genres order."""
+        return self.mean_scores(ncd_row(query, self.references, self.sizes, self.compressor))
+
+    def vote(self, ncds):
+        """
+        (genre index, share of the votes) of the k nearest references; a tie
+        goes to the tied genre of the nearest reference.
+        """
+        nearest = np.argsort(ncds, kind='stable')[:self.k]
+        votes = np.bincount(self.genre_of[nearest], minlength=len(self.genres))
+        winners = votes == votes.max()
+        best = int(next(g for g in self.genre_of[nearest] if winners[g]))
+        return best, votes[best] / len(nearest)
+
+    def classify(self, query):
+        """
+        (identified genre, confidence, average NCD per genre). The confidence
+        is 1 - the average NCD of the genre for 'mean' (the first genre wins
+        ties) and the share of the k votes for 'knn'.
+        """
+        return self.classify_ncds(ncd_row(query, self.references, self.sizes, self.compressor))
+
+    def classify_ncds(self, ncds):
+        """classify() from the NCDs of a query to every reference (e.g. a row of a score matrix)."""
+        scores = self.mean_scores(ncds)
+        if self.method == 'knn':
+            best, confidence = self.vote(ncds)
+        else:
+            best = int(np.argmin(scores))
+            confidence = 1.0 - scores[best]
+        return self.genres[best], confidence, scores
+
+# Scorer shared with the worker processes (set once per worker by init_worker)
+_scorer = None
+
+def init_worker(scorer):
+    global _scorer
+    _scorer = scorer
+
+def classify_query(query):
+    return _scorer.classify(query)
+
+def classify_queries(scorer, queries, workers=None):
+    """classify() of every query data, in order, over a process pool."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(scorer,)) as executor:
+        return list(executor.map(classify_query, queries))
+
+def write_genre_csv(output_csv, genres, qnames, results):
+    """results_genre CSV of main.cpp, followed by one average-NCD column per genre."""
+    os.makedirs(os.path.dirname(output_csv) or ".", exist_ok=True)
+    with open(output_csv, "w") as csv:
+        csv.write(GENRE_CSV_HEADER + "".join(f",NCD {genre}" for genre in genres) + "\n")
+        for qname, (identified, confidence, scores) in zip(qnames, results):
+            expected = expected_genre(qname)
+            correct = "true" if expected == identified else "false"
+            csv.write(f"{qname},{identified},{format_ncd(confidence)},{expected},{correct}"
+                      + "".join(f",{format_ncd(score)}" for score in scores) + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genre identification by average NCD to the genre references.")
+    parser.add_argument("--compressor", default="gzip")
+    parser.add_argument("--genre-db", default="../database2/", help="one folder of .freqs references per genre")
+    parser.add_argument("--queries", default="../queries_genre/", help="folder of query .freqs files")
+    parser.add_argument("--output", default=None, help="output CSV (default: ../results/genre/results_genre_<compressor>.csv)")
+    parser.add_argument("--method", choices=GENRE_METHODS, default="mean", help="average NCD per genre or k-NN vote")
+    parser.add_argument("-k", type=int, default=5, help="neighbours of the k-NN vote")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    args = parser.parse_args()
+
+    genre_db = load_genre_database(args.genre_db)
+    print("Loaded genres: " + " ".join(f"{genre}({len(files)} files)" for genre, files in genre_db.items()))
+    scorer = GenreScorer(genre_db, args.compressor, args.cache_dir, args.method, args.k)
+
+    queries = load_freq_directory(args.queries)
+    start = time.perf_counter()
+    results = classify_queries(scorer, [data for _, data in queries], args.workers)
+    elapsed = time.perf_counter() - start
+
+    qnames = [qname for qname, _ in queries]
+    for qname, (identified, confidence, _) in zip(qnames, results):
+        print(f"Result: {qname} => Genre: {identified} (Expected: {expected_genre(qname)}, "
+              f"Confidence: {format_ncd(confidence)})")
+
+    output_csv = args.output or f"../results/genre/results_genre_{scorer.compressor}.csv"
+    write_genre_csv(output_csv, scorer.genres, qnames, results)
+    print(f"{len(queries)} queries in {elapsed:.2f}s, results saved to {output_csv}")
@@ -0,0 +1,92 @@
+import os
+import sys
+import argparse
+
+from freq_loader import load_database, load_freq_file
+from early import EarlyStopMatcher
+from ncd import NCDMatcher
+from prefilter import CandidateIndex
+from primed import PrimedMatcher
+
+CSV_HEADER = "music query,noise type,noise intensity,result,NCD,expected\n"
+
+def format_ncd(value):
+    """Same formatting as the default std::ostream output of a double."""
+    return f"{value:.6g}"
+
+def parse_query_name(qname):
+    """(noise type, intensity) from a query file name, with the same rules as main.cpp."""
+    base_name = qname[:-len(".freqs")] if qname.endswith(".freqs") else qname
+    p1 = base_name.find("_")
+    p2 = base_name.find("_intensity_")
+    if p1 == -1 or p2 == -1:
+        return "unknown", "unknown"
+    return base_name[p1 + 1:p2], base_name[p2 + len("_intensity_"):]
+
+def is_expected_match(qname, best_match):
+    """True if the query name prefix (before the first '_') appears in the matched song name."""
+    expected_base = qname.split("_", 1)[0].lower()
+    actual_base = best_match.split(".", 1)[0].lower()
+    return expected_base in actual_base
+
+def csv_row(qname, best_match, best_ncd):
+    noise_type, intensity = parse_query_name(qname)
+    expected = "true" if is_expected_match(qname, best_match) else "false"
+    return f"{qname},{noise_type},{intensity},{best_match},{format_ncd(best_ncd)},{expected}\n"
+
+def list_queries(query_dir):
+    return sorted(f for f in os.listdir(query_dir) if f.endswith(".freqs"))
+
+def run_batch(matcher, query_dir, output_csv, index=None, top_k=None):
+    """
+    Score every query of query_dir and write the same CSV as the match binary.
+    With a CandidateIndex, only its top_k candidates of each query get an exact NCD.
+    """
+    os.makedirs(os.path.dirname(output_csv) or ".", exist_ok=True)
+    with open(output_csv, "w") as csv:
+        csv.write(CSV_HEADER)
+        for qname in list_queries(query_dir):
+            qdata = load_freq_file(os.path.join(query_dir, qname))
+            candidates = index.shortlist(qdata, top_k) if index is not None else None
+            best_match, best_ncd = matcher.best_match(qdata, candidates)
+            print(f"Query: {qname} => Best Match: {best_match} (NCD = {format_ncd(best_ncd)})")
+            csv.write(csv_row(qname, best_match, best_ncd))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Music identification by NCD (Python counterpart of ./match).")
+    parser.add_argument("--compressor", default="gzip")
+    parser.add_argument("--query", default=None, help="single query file")
+    parser.add_argument("--output", default=None, help="output CSV (default: ../results/results_<compressor>.csv)")
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    parser.add_argument("--top-k", type=int, default=None, help="only re-rank the K best pre-filter candidates")
+    parser.add_argument("--primed", action="store_true", help="approximate C(xy) with compressors primed per song (gzip, zstd)")
+    parser.add_argument("--early", action="store_true", help="stop compressing candidates that cannot beat the best one (gzip)")
+    args = parser.parse_args()
+
+    database = load_database(args.db)
+    try:
+        if args.primed:
+            matcher = PrimedMatcher(database, args.compressor, args.cache_dir)
+        elif args.early:
+            matcher = EarlyStopMatcher(database, args.compressor, args.cache_dir)
+        else:
+            matcher = NCDMatcher(database, args.compressor, args.cache_dir)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    index = CandidateIndex(database) if args.top_k else None
+
+    if args.query:
+        if not os.path.exists(args.query):
+            print(f"Query file \"{args.query}\" does not exist.")
+            sys.exit(1)
+        qname = os.path.basename(args.query)
+        qdata = load_freq_file(args.query)
+        candidates = index.shortlist(qdata, args.top_k) if index is not None else None
+        best_match, best_ncd = matcher.best_match(qdata, candidates)
+        print(f"Query: {qname} => Best Match: {best_match} (NCD = {format_ncd(best_ncd)})")
+    else:
+        output_csv = args.output or f"../results/results_{args.compressor}.csv"
+        run_batch(matcher, args.queries, output_csv, index, args.top_k)
@@ -0,0 +1,106 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+from compressors import compress_size, compressor_from_string
+
+def compute_ncd_from_sizes(cx, cy, cxy):
+    """NCD(x, y) = (C(xy) - min(C(x), C(y))) / max(C(x), C(y)), as in src/ncd.cpp."""
+    return (cxy - min(cx, cy)) / max(cx, cy)
+
+def compute_ncd(x, y, compressor):
+    """Exact NCD of two signatures, recompressing both (same as compute_ncd in src/ncd.cpp)."""
+    cx = compress_size(x, compressor)
+    cy = compress_size(y, compressor)
+    cxy = compress_size(b"".join((x, y)), compressor)
+    return compute_ncd_from_sizes(cx, cy, cxy)
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def ncd_row(query, signatures, sizes, compressor, level=None):
+    """NCD of query against every signature, given their precomputed sizes C(y)."""
+    cx = compress_size(query, compressor, level)
+    ncds = np.empty(len(signatures))
+    for i, (data, cy) in enumerate(zip(signatures, sizes)):
+        cxy = compress_size(b"".join((query, data)), compressor, level)
+        ncds[i] = compute_ncd_from_sizes(cx, int(cy), cxy)
+    return ncds
+
+class SizeCache:
+    """
+    Persistent C(y) sizes for one compressor, keyed by a hash of the signature.
+
+    Stored as JSON in <cache_dir>/sizes_<compressor>.json, so a database
+    entry is compressed on its own only once per compressor, however many
+    queries and runs score against it.
+    """
+
+    def __init__(self, compressor, cache_dir="../ncd_cache"):
+        self.compressor = compressor_from_string(compressor)
+        self.path = None
+        self.sizes = {}
+        self.dirty = False
+        if cache_dir is not None:
+            self.path = os.path.join(cache_dir, f"sizes_{self.compressor}.json")
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    self.sizes = json.load(f)
+
+    def size(self, data):
+        key = content_hash(data)
+        size = self.sizes.get(key)
+        if size is None:
+            size = compress_size(data, self.compressor)
+            self.sizes[key] = size
+            self.dirty = True
+        return size
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.sizes, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+class NCDMatcher:
+    """
+    NCD scoring of queries against a fixed database for one compressor.
+
+    C(y) of every database entry is computed (or loaded from the SizeCache)
+    once when the matcher is built; each query then costs one C(x) and one
+    C(xy) per candidate. Scores are identical to compute_ncd.
+    """
+
+    def __init__(self, database, compressor, cache_dir="../ncd_cache"):
+        self.compressor = compressor_from_string(compressor)
+        self.names = [name for name, _ in database]
+        self.signatures = [data for _, data in database]
+
+        cache = SizeCache(self.compressor, cache_dir)
+        self.sizes = np.array([cache.size(data) for data in self.signatures], dtype=np.int64)
+        cache.save()
+
+    def score(self, query, candidates=None):
+        """NCD of query against every database entry (or the given indices), in database order."""
+        if candidates is None:
+            return ncd_row(query, self.signatures, self.sizes, self.compressor)
+        return ncd_row(query, [self.signatures[i] for i in candidates], self.sizes[candidates], self.compressor)
+
+    def best_match(self, query, candidates=None):
+        """
+        (name, NCD) of the closest database entry; the first one wins ties, like main.cpp.
+        With candidates (database indices, e.g. a prefilter shortlist) only those are scored.
+        """
+        if candidates is None:
+            ncds = self.score(query)
+            best = int(np.argmin(ncds))
+            return self.names[best], float(ncds[best])
+        candidates = np.sort(candidates)
+        ncds = self.score(query, candidates)
+        best = int(np.argmin(ncds))
+        return self.names[candidates[best]], float(ncds[best])
@@ -0,0 +1,307 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sound_utils"))
+
+from build_queries import query_signature, song_clips
+from get_max_freqs import downsample, frame_powers, num_frames, top_freqs
+from noise_engine import NOISE_TYPES
+from signature_cache import SignatureCache, hash_audio, hash_file
+
+from batch_score import score_grids
+from compressors import COMPRESSORS, available_compressors
+from ranking import ranking_metrics
+
+SWEEP_CSV_HEADER = "ws,sh,ds,nf,compressor,queries,accuracy,MRR,bytes_per_audio_s,ncd_per_s,score_s"
+
+# Extraction stages timed by the workers, in pipeline order
+STAGES = ("decode", "noise", "cache", "downsample", "fft", "select")
+
+def parameter_grid(window_sizes, shifts, downsamplings, nfs):
+    """(ws, sh, ds, nf) of every combination; nf must stay below the ws // 2 bins of a frame."""
+    return [(ws, sh, ds, nf) for ws, sh, ds, nf in itertools.product(window_sizes, shifts, downsamplings, nfs)
+            if nf < ws // 2]
+
+def variant_name(ws, sh, ds, nf):
+    return f"ws={ws}:sh={sh}:ds={ds}:nf={nf}"
+
+def signal_variants(mono, grid, times):
+    """
+    {(ws, sh, ds, nf): signature bytes} of one mono 44.1 kHz signal.
+
+    The signal is downsampled once per ds and framed and transformed once
+    per (ws, sh); the bins of every frame are sorted once for the largest nf
+    of the grid and the smaller nfs are prefixes of that order. Stage times
+    are added to times.
+    """
+    signatures = {}
+    for ds in sorted({ds for _, _, ds, _ in grid}):
+        start = time.perf_counter()
+        mono_down = downsample(mono, ds)
+        times["downsample"] += time.perf_counter() - start
+
+        for ws, sh in sorted({(ws, sh) for ws, sh, d, _ in grid if d == ds}):
+            nfs = sorted({nf for w, s, d, nf in grid if (w, s, d) == (ws, sh, ds)})
+            top = np.empty((num_frames(len(mono_down), ws, sh), nfs[-1]), dtype=np.uint8)
+            powers = frame_powers(mono_down, ws, sh)
+            while True:
+                start = time.perf_counter()
+                batch = next(powers, None)
+                times["fft"] += time.perf_counter() - start
+                if batch is None:
+                    break
+                start = time.perf_counter()
+                first, power = batch
+                top[first:first + len(power)] = top_freqs(power, nfs[-1])
+                times["select"] += time.perf_counter() - start
+
+            for nf in nfs:
+                signatures[ws, sh, ds, nf] = np.ascontiguousarray(top[:, :nf]).tobytes()
+    return signatures
+
+def independent_signatures(audio, sample_rate, grid):
+    """{variant: signature bytes} of a decoded clip, each variant extracted from scratch as get_max_freqs would."""
+    return {(ws, sh, ds, nf): query_signature(audio, sample_rate, None, ws, sh, ds, nf).tobytes()
+            for ws, sh, ds, nf in grid}
+
+def cached_variants(signal, audio_hash, grid, cache, times):
+    """
+    {variant: signature bytes} of one decoded signal and the number of cache
+    hits: variants already in the SignatureCache (keyed by audio_hash and
+    the variant's parameters) are read, the others are extracted together by
+    signal_variants and stored.
+    """
+    start = time.perf_counter()
+    signatures = {}
+    if cache is not None:
+        for ws, sh, ds, nf in grid:
+            data = cache.get(cache.key(audio_hash, ws, sh, ds, nf))
+            if data is not None:
+                signatures[ws, sh, ds, nf] = data
+    hits = len(signatures)
+    times["cache"] += time.perf_counter() - start
+
+    missing = [variant for variant in grid if variant not in signatures]
+    if missing:
+        computed = signal_variants(np.sum(signal, axis=1), missing, times)
+        start = time.perf_counter()
+        if cache is not None:
+            for variant, data in computed.items():
+                cache.put(cache.key(audio_hash, *variant), data)
+        signatures.update(computed)
+        times["cache"] += time.perf_counter() - start
+    return signatures, hits
+
+def sweep_song(input_file, grid, num_segments, segment_duration_sec, intensities, noise_types,
+               seed=None, quantize=True, verify=False, cache=None):
+    """
+    Worker: signatures of one song and of its noisy queries for every
+    variant of the grid, decoding the song once.
+
+    The queries are the clips build_queries.py would write (same names,
+    noise and quantization), kept in memory. With a SignatureCache, every
+    variant is looked up first, with the keys of batch_get_max_freqs.py (hash
+    of the song file) and build_queries.py (hash of the clip samples), so a
+    rerun or a grown grid only extracts the new variants. Returns (song name,
+    {variant: bytes}, [(query name, {variant: bytes})], stage times, seconds
+    of audio, cache hits, independent extraction time, mismatches); the last
+    two are only measured with verify.
+    """
+    times = dict.fromkeys(STAGES, 0.0)
+    start = time.perf_counter()
+    audio, sample_rate = sf.read(input_file, always_2d=True)
+    if sample_rate != 44100:
+        raise ValueError("Sample rate must be 44100 Hz.")
+    if audio.shape[1] != 2:
+        raise ValueError("Only stereo audio is supported.")
+    subtype = sf.info(input_file).subtype if quantize else None
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    times["decode"] += time.perf_counter() - start
+
+    signals = [(f"{base_name}.freqs", audio)]
+    clips = song_clips(audio, sample_rate, base_name, num_segments, segment_duration_sec,
+                       intensities, noise_types, seed, subtype)
+    while True:
+        start = time.perf_counter()
+        clip = next(clips, None)
+        times["noise"] += time.perf_counter() - start
+        if clip is None:
+            break
+        signals.append(clip)
+
+    variants = []
+    hits = 0
+    independent = 0.0
+    mismatches = 0
+    for i, (name, signal) in enumerate(signals):
+        audio_hash = None
+        if cache is not None:
+            start = time.perf_counter()
+            audio_hash = hash_file(input_file) if i == 0 else hash_audio(signal, sample_rate)
+            times["cache"] += time.perf_counter() - start
+        shared, signal_hits = cached_variants(signal, audio_hash, grid, cache, times)
+        hits += signal_hits
+        variants.append((name, shared))
+        if verify:
+            start = time.perf_counter()
+            reference = independent_signatures(signal, sample_rate, grid)
+            independent += time.perf_counter() - start
+            mismatches += sum(shared[variant] != reference[variant] for variant in grid)
+
+    seconds = sum(len(signal) for _, signal in signals) / sample_rate
+    (song_name, song_variants), queries = variants[0], variants[1:]
+    return song_name, song_variants, queries, times, seconds, hits, independent, mismatches
+
+def extract_grid(songs, grid, num_segments, segment_duration_sec, intensities, noise_types,
+                 workers=None, seed=None, quantize=True, verify=False, cache=None):
+    """
+    Database and query signatures of every variant of the grid, one song per
+    process. Returns ({variant: (database, queries)} with (name, bytes)
+    lists sorted by name, extraction statistics).
+    """
+    database = []
+    queries = []
+    stats = {"times": dict.fromkeys(STAGES, 0.0), "seconds": 0.0, "hits": 0, "independent": 0.0, "mismatches": 0}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(sweep_song, song, grid, num_segments, segment_duration_sec, intensities,
+                            noise_types, seed, quantize, verify, cache): song
+            for song in songs
+        }
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                (song_name, song_variants, song_queries, times, seconds, hits, independent,
+                 mismatches) = future.result()
+            except Exception as e:
+                print(f"Failed to process {name}: {e}")
+                continue
+            database.append((song_name, song_variants))
+            queries += song_queries
+            for stage, elapsed in times.items():
+                stats["times"][stage] += elapsed
+            stats["seconds"] += seconds
+            stats["hits"] += hits
+            stats["independent"] += independent
+            stats["mismatches"] += mismatches
+            print(f"Processed {name}: {len(song_queries)} queries x {len(grid)} variants")
+
+    database.sort(key=lambda entry: entry[0])
+    queries.sort(key=lambda entry: entry[0])
+    signatures = {variant: ([(name, data[variant]) for name, data in database],
+                            [(name, data[variant]) for name, data in queries])
+                  for variant in grid}
+    return signatures, stats
+
+def score_grid(signatures, compressors, workers=None, cache_dir="../ncd_cache"):
+    """
+    [(variant, compressor, metrics, NCDs per second, seconds)] of every
+    variant: full query x song matrices of all variants and compressors in
+    a single batch_score.score_grids pool, ranked with
+    ranking.ranking_metrics (top-1 accuracy and MRR). The throughput is per
+    worker process, from the worker seconds spent on each matrix.
+    """
+    sets = {variant_name(*variant): ([data for _, data in queries], [data for _, data in database])
+            for variant, (database, queries) in signatures.items()}
+    timings = {}
+    matrices = score_grids(sets, compressors, workers, cache_dir, timings=timings)
+
+    rows = []
+    for variant, (database, queries) in signatures.items():
+        query_names = [name for name, _ in queries]
+        database_names = [name for name, _ in database]
+        for compressor in compressors:
+            matrix = matrices[variant_name(*variant), compressor]
+            elapsed = timings.get((variant_name(*variant), compressor), 0.0)
+            metrics, _ = ranking_metrics({compressor: matrix}, query_names, database_names, ks=(1,))
+            rows.append((variant, compressor, metrics[compressor], matrix.size / elapsed if elapsed else 0.0, elapsed))
+    return rows
+
+def write_sweep_csv(rows, output_csv):
+    os.makedirs(os.path.dirname(output_csv) or ".", exist_ok=True)
+    tmp_path = f"{output_csv}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as csv:
+        csv.write(SWEEP_CSV_HEADER + "\n")
+        for (ws, sh, ds, nf), compressor, metrics, ncd_per_s, elapsed in rows:
+            csv.write(f"{ws},{sh},{ds},{nf},{compressor},{metrics['queries']},{metrics['top-1']:.6f},"
+                      f"{metrics['MRR']:.6f},{nf * 44100 / (ds * sh):.1f},{ncd_per_s:.1f},{elapsed:.3f}\n")
+    os.replace(tmp_path, output_csv)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Accuracy and throughput of the matcher over a grid of signature extraction parameters.")
+    parser.add_argument("input_dir", help="folder with the songs")
+    parser.add_argument("--ws", type=int, nargs="+", default=[1024], help="window sizes")
+    parser.add_argument("--sh", type=int, nargs="+", default=[256], help="window shifts")
+    parser.add_argument("--ds", type=int, nargs="+", default=[4], help="downsampling factors")
+    parser.add_argument("--nf", type=int, nargs="+", default=[4], help="frequencies kept per window")
+    parser.add_argument("--compressors", nargs="+", default=list(COMPRESSORS))
+    parser.add_argument("--segments", type=int, default=10, help="number of query segments per song")
+    parser.add_argument("--length", type=float, default=5, help="segment duration in seconds")
+    parser.add_argument("--intensities", type=float, nargs="+", default=[0.1, 0.3, 0.5])
+    parser.add_argument("--noise-types", nargs="+", default=list(NOISE_TYPES), choices=NOISE_TYPES)
+    parser.add_argument("--seed", type=int, default=42, help="seed for reproducible noise")
+    parser.add_argument("--no-quantize", action="store_true",
+                        help="skip the PCM quantization that the WAV-based pipeline applies")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    parser.add_argument("--signature-cache", default=None,
+                        help="signature cache folder shared with batch_get_max_freqs.py and build_queries.py (disabled by default)")
+    parser.add_argument("--cache-size", type=int, default=2048, help="signature cache size limit in MB")
+    parser.add_argument("--output", default="../results/param_sweep.csv", help="where the sweep table is written")
+    parser.add_argument("--verify", action="store_true",
+                        help="also extract every variant from scratch, compare and time it")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Input folder '{args.input_dir}' does not exist.")
+        sys.exit(1)
+    songs = [os.path.join(args.input_dir, filename) for filename in sorted(os.listdir(args.input_dir))
+             if filename.lower().endswith(('.wav', '.flac', '.ogg'))]
+    grid = parameter_grid(args.ws, args.sh, args.ds, args.nf)
+    if not songs or not grid:
+        print("Nothing to sweep: no audio files or no valid (ws, sh, ds, nf) with nf < ws / 2")
+        sys.exit(1)
+
+    compressors = available_compressors(args.compressors)
+    missing = set(args.compressors) - set(compressors)
+    if missing:
+        print(f"Skipping compressors without Python bindings: {', '.join(sorted(missing))}")
+
+    cache = None
+    if args.signature_cache:
+        cache = SignatureCache(args.signature_cache, args.cache_size * 1024**2)
+
+    start = time.perf_counter()
+    signatures, stats = extract_grid(songs, grid, args.segments, args.length, args.intensities, args.noise_types,
+                                     args.workers, args.seed, not args.no_quantize, args.verify, cache)
+    extraction = time.perf_counter() - start
+    stages = ", ".join(f"{stage} {elapsed:.2f}s" for stage, elapsed in stats["times"].items())
+    print(f"\n{len(grid)} variants of {stats['seconds']:.0f}s of audio extracted in {extraction:.2f}s ({stages})")
+    if cache is not None:
+        print(f"{stats['hits']} signature cache hits, {cache.evict()} entries evicted")
+    if args.verify:
+        extracted = stats["times"]["downsample"] + stats["times"]["fft"] + stats["times"]["select"]
+        print(f"Independent extraction: {stats['independent']:.2f}s vs {extracted:.2f}s shared, "
+              f"{stats['mismatches']} mismatching signatures")
+
+    try:
+        rows = score_grid(signatures, compressors, args.workers, args.cache_dir)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    write_sweep_csv(rows, args.output)
+
+    for (ws, sh, ds, nf), compressor, metrics, ncd_per_s, _ in rows:
+        print(f"{variant_name(ws, sh, ds, nf)} {compressor}: accuracy {metrics['top-1'] * 100:.2f}%, "
+              f"MRR {metrics['MRR']:.4f}, {ncd_per_s:.0f} NCD/s")
+    print(f"Sweep table saved to {args.output}")
+    if args.verify and stats["mismatches"]:
+        sys.exit(1)
@@ -0,0 +1,117 @@
+import argparse
+
+import numpy as np
+
+from compressors import available_compressors
+from freq_loader import load_database, load_freq_directory
+
+# Multiplier of the polynomial hash combining consecutive frames into an n-gram
+NGRAM_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+def frame_tokens(signature, nf=4, ngram=1):
+    """
+    Distinct tokens of a signature: every window's nf bins packed in one
+    integer, or a hash of ngram consecutive windows when ngram > 1.
+    """
+    data = np.frombuffer(signature, dtype=np.uint8)
+    frames = data[:len(data) // nf * nf].reshape(-1, nf)
+    tokens = np.zeros(len(frames), dtype=np.uint64)
+    for i in range(nf):
+        tokens |= frames[:, i].astype(np.uint64) << np.uint64(8 * i)
+    if ngram > 1:
+        n = len(tokens) - ngram + 1
+        if n <= 0:
+            return np.empty(0, dtype=np.uint64)
+        hashed = tokens[:n].copy()
+        for i in range(1, ngram):
+            hashed = hashed * NGRAM_HASH + tokens[i:i + n]
+        tokens = hashed
+    return np.unique(tokens)
+
+class CandidateIndex:
+    """
+    Inverted index from frame tokens to database entries.
+
+    A query is a short segment of a song, so entries are ranked by
+    containment: the fraction of the query's distinct tokens that also occur
+    in the entry. Only the top K entries then need an exact NCD.
+    """
+
+    def __init__(self, database, nf=4, ngram=1):
+        self.nf = nf
+        self.ngram = ngram
+        self.names = [name for name, _ in database]
+
+        per_entry = [frame_tokens(data, nf, ngram) for _, data in database]
+        tokens = np.concatenate(per_entry) if per_entry else np.empty(0, dtype=np.uint64)
+        entries = np.repeat(np.arange(len(per_entry), dtype=np.int32), [len(t) for t in per_entry])
+        order = np.argsort(tokens)
+        self.tokens = tokens[order]
+        self.entries = entries[order]
+
+    def __len__(self):
+        return len(self.names)
+
+    def scores(self, query):
+        """Containment of the query in every database entry, in database order."""
+        query_tokens = frame_tokens(query, self.nf, self.ngram)
+        if len(query_tokens) == 0:
+            return np.zeros(len(self))
+        lo = np.searchsorted(self.tokens, query_tokens, side='left')
+        hi = np.searchsorted(self.tokens, query_tokens, side='right')
+        counts = hi - lo
+        positions = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        hits = np.bincount(self.entries[positions], minlength=len(self))
+        return hits / len(query_tokens)
+
+    def shortlist(self, query, k):
+        """Indices of the k best candidates, best first (database order among ties)."""
+        order = np.argsort(-self.scores(query), kind='stable')
+        return order[:k]
+
+def candidate_ranks(index, queries, best):
+    """Position of the exact-NCD best entry best[i] in the shortlist order of query i."""
+    ranks = np.empty(len(queries), dtype=np.int64)
+    for i, (_, query) in enumerate(queries):
+        order = np.argsort(-index.scores(query), kind='stable')
+        ranks[i] = int(np.flatnonzero(order == best[i])[0])
+    return ranks
+
+def recall_at_k(ranks, ks):
+    """{k: fraction of queries whose exact best match is within the first k candidates}."""
+    return {k: float(np.mean(ranks < k)) for k in ks}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@K of the frame-token pre-filter against exact NCD.")
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--compressors", nargs="+", default=['gzip', 'bzip2', 'zstd', 'lzma'])
+    parser.add_argument("--top-k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--ngram", type=int, default=1, help="consecutive windows per token")
+    parser.add_argument("--nf", type=int, default=4, help="bins per window in the .freqs files")
+    parser.add_argument("--scores-dir", default=None, help="reuse matrices written by batch_score.py")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    args = parser.parse_args()
+
+    database = load_database(args.db)
+    queries = load_freq_directory(args.queries)
+    index = CandidateIndex(database, args.nf, args.ngram)
+
+    compressors = available_compressors(args.compressors)
+    if args.scores_dir:
+        from batch_score import load_matrices
+        matrices, query_names, database_names = load_matrices(args.scores_dir, compressors)
+        if query_names != [name for name, _ in queries] or database_names != index.names:
+            print(f"Score matrices in {args.scores_dir} do not match --db and --queries.")
+            raise SystemExit(1)
+    else:
+        from batch_score import score_matrices
+        matrices = score_matrices(database, queries, compressors, args.workers, args.cache_dir)
+
+    print(f"{len(queries)} queries, {len(database)} songs, ngram={args.ngram}")
+    print("compressor," + ",".join(f"recall@{k}" for k in args.top_k))
+    for compressor, matrix in matrices.items():
+        ranks = candidate_ranks(index, queries, np.argmin(matrix, axis=1))
+        recall = recall_at_k(ranks, args.top_k)
+        print(compressor + "," + ",".join(f"{recall[k]:.3f}" for k in args.top_k))
@@ -0,0 +1,101 @@
+import time
+import zlib
+import argparse
+
+import numpy as np
+
+from compressors import compress_size, compressor_from_string
+from freq_loader import load_database, load_freq_directory
+from ncd import NCDMatcher, compute_ncd_from_sizes
+
+# Compressors whose state can be primed with a database entry
+PRIMED_COMPRESSORS = ('gzip', 'zstd')
+
+class ZlibPrimed:
+    """
+    Deflate stream that has already consumed y; C(yx) is obtained by feeding
+    x to a copy of it. Same output as compressing y + x in one call.
+    """
+
+    def __init__(self, data):
+        self.state = zlib.compressobj()
+        self.prefix_size = len(self.state.compress(bytes(data)))
+
+    def joint_size(self, x):
+        state = self.state.copy()
+        return self.prefix_size + len(state.compress(x)) + len(state.flush())
+
+class ZstdPrimed:
+    """
+    y as a raw-content zstd dictionary (level 3, precomputed once); C(xy) is
+    approximated by C(y) + C(x | y), the size of x compressed with it.
+    """
+
+    def __init__(self, data, size):
+        import zstandard
+        dictionary = zstandard.ZstdCompressionDict(bytes(data), dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        dictionary.precompute_compress(level=3)
+        self.compressor = zstandard.ZstdCompressor(level=3, dict_data=dictionary, write_dict_id=False)
+        self.size = int(size)
+
+    def joint_size(self, x):
+        return self.size + len(self.compressor.compress(x))
+
+class PrimedMatcher(NCDMatcher):
+    """
+    NCDMatcher whose C(xy) comes from a compressor primed once per database
+    entry, so a query only compresses its own bytes on top of each state.
+
+    The scores approximate compute_ncd: gzip gives C(yx) instead of C(xy) and
+    zstd uses y as a dictionary. Every entry keeps its compressor state in
+    memory (about 256 KiB for gzip).
+    """
+
+    def __init__(self, database, compressor, cache_dir="../ncd_cache"):
+        compressor = compressor_from_string(compressor)
+        if compressor not in PRIMED_COMPRESSORS:
+            raise ValueError(f"Primed NCD is not available for {compressor} (only {', '.join(PRIMED_COMPRESSORS)})")
+        super().__init__(database, compressor, cache_dir)
+        if compressor == 'gzip':
+            self.contexts = [ZlibPrimed(data) for data in self.signatures]
+        else:
+            self.contexts = [ZstdPrimed(data, size) for data, size in zip(self.signatures, self.sizes)]
+
+    def score(self, query, candidates=None):
+        indices = range(len(self.contexts)) if candidates is None else candidates
+        cx = compress_size(query, self.compressor)
+        ncds = np.empty(len(indices))
+        for k, i in enumerate(indices):
+            cxy = self.contexts[i].joint_size(query)
+            ncds[k] = compute_ncd_from_sizes(cx, int(self.sizes[i]), cxy)
+        return ncds
+
+def score_all(matcher, queries):
+    """(queries x database NCD matrix, seconds) of a matcher."""
+    start = time.perf_counter()
+    matrix = np.array([matcher.score(query) for _, query in queries])
+    return matrix, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare primed-compressor NCD with the exact concatenation NCD.")
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--compressors", nargs="+", default=list(PRIMED_COMPRESSORS))
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    args = parser.parse_args()
+
+    database = load_database(args.db)
+    queries = load_freq_directory(args.queries)
+    pairs = len(queries) * len(database)
+
+    print("compressor,exact NCD/s,primed NCD/s,speedup,mean abs error,max abs error,correlation,top-1 agreement")
+    for compressor in args.compressors:
+        exact, exact_time = score_all(NCDMatcher(database, compressor, args.cache_dir), queries)
+        primed_matcher = PrimedMatcher(database, compressor, args.cache_dir)
+        primed, primed_time = score_all(primed_matcher, queries)
+
+        error = np.abs(primed - exact)
+        correlation = np.corrcoef(primed.ravel(), exact.ravel())[0, 1]
+        agreement = np.mean(np.argmin(primed, axis=1) == np.argmin(exact, axis=1))
+        print(f"{compressor},{pairs / exact_time:.0f},{pairs / primed_time:.0f},{exact_time / primed_time:.1f}x,"
+              f"{error.mean():.6f},{error.max():.6f},{correlation:.6f},{agreement:.3f}")
@@ -0,0 +1,17 @@
+import re
+
+# <song>_segment<i>_<noise>_intensity_<value>.freqs, as written by the query pipeline
+QUERY_PATTERN = r'^(?P<original>.*)_segment(?P<segment>\d+)_(?P<noise>white|pink|brown)_intensity_(?P<intensity>[\d.]+)\.freqs$'
+
+_query_name = re.compile(QUERY_PATTERN)
+
+def original_filename(qname):
+    """
+    Accuracy rule of the plots: the database file a query was cut from, i.e.
+    the name without its _segment<i>_<noise>_intensity_<value> suffix (the
+    name itself if it does not follow QUERY_PATTERN).
+    """
+    match = _query_name.match(qname)
+    if match is None:
+        return qname
+    return match['original'] + '.freqs'
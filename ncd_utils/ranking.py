@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from batch_score import load_matrices, save_matrices, score_matrices
+from query_names import original_filename
+from compressors import COMPRESSORS, available_compressors
+from freq_loader import load_database, load_freq_directory
+
+RANKING_CSV_HEADER = "compressor,queries,AUC,MRR"
+
+def relevance(query_names, database_names):
+    """queries x database boolean matrix: the song a query was cut from (barplot.py rule)."""
+    column = {name: j for j, name in enumerate(database_names)}
+    relevant = np.zeros((len(query_names), len(database_names)), dtype=bool)
+    for i, qname in enumerate(query_names):
+        j = column.get(original_filename(qname))
+        if j is not None:
+            relevant[i, j] = True
+    return relevant
+
+def true_ranks(scores, relevant):
+    """
+    1-based rank of the true song of every query (rows of relevant with one
+    True) in scores, a compressors x queries x database NCD array. Ties go to
+    the first column, as with argmin, so rank 1 is the best match of the CSVs.
+    """
+    target = np.argmax(relevant, axis=1)
+    true_ncd = np.take_along_axis(scores, target[None, :, None], axis=2)
+    before = np.arange(scores.shape[2])[None, None, :] < target[None, :, None]
+    return 1 + np.sum((scores < true_ncd) | ((scores == true_ncd) & before), axis=2)
+
+def top_k_accuracy(ranks, ks):
+    """compressors x len(ks) fractions of queries whose true song is within the first k."""
+    return np.stack([np.mean(ranks <= k, axis=1) for k in ks], axis=1)
+
+def mean_reciprocal_rank(ranks):
+    return np.mean(1.0 / ranks, axis=1)
+
+def roc_curves(scores, relevant):
+    """
+    [(fpr, tpr, auc)] of every compressor over all (query, song) pairs, a
+    lower NCD meaning a more likely match. All compressors are sorted in one
+    call; tied NCDs make a single point, so the AUC counts ties as half.
+    """
+    flat = scores.reshape(len(scores), -1)
+    labels = relevant.ravel()
+    order = np.argsort(flat, axis=1, kind='stable')
+    sorted_scores = np.take_along_axis(flat, order, axis=1)
+    sorted_labels = labels[order]
+    tps = np.cumsum(sorted_labels, axis=1)
+    fps = np.cumsum(~sorted_labels, axis=1)
+    positives, negatives = tps[:, -1], fps[:, -1]
+
+    curves = []
+    for c in range(len(scores)):
+        ends = np.r_[np.flatnonzero(np.diff(sorted_scores[c])), flat.shape[1] - 1]
+        fpr = np.r_[0.0, fps[c, ends] / negatives[c]]
+        tpr = np.r_[0.0, tps[c, ends] / positives[c]]
+        curves.append((fpr, tpr, float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))))
+    return curves
+
+def ranking_metrics(matrices, query_names, database_names, ks=(1, 3, 5)):
+    """
+    ({compressor: {metric: value}}, {compressor: (fpr, tpr)}) of full
+    queries x database score matrices. Queries whose song is not in the
+    database are left out.
+    """
+    compressors = list(matrices)
+    relevant = relevance(query_names, database_names)
+    known = relevant.any(axis=1)
+    if not known.any():
+        raise ValueError("No query is named after a database song (<song>_segment<i>_<noise>_intensity_<value>.freqs)")
+    scores = np.stack([np.asarray(matrices[c])[known] for c in compressors])
+    relevant = relevant[known]
+
+    ranks = true_ranks(scores, relevant)
+    top_k = top_k_accuracy(ranks, ks)
+    mrr = mean_reciprocal_rank(ranks)
+    curves = roc_curves(scores, relevant)
+
+    metrics = {}
+    for c, compressor in enumerate(compressors):
+        metrics[compressor] = {'queries': int(known.sum()), 'AUC': curves[c][2], 'MRR': float(mrr[c])}
+        metrics[compressor].update({f"top-{k}": float(top_k[c, i]) for i, k in enumerate(ks)})
+    return metrics, {compressor: curves[c][:2] for c, compressor in enumerate(compressors)}
+
+def write_ranking(output_dir, metrics, curves, ks):
+    """metrics.csv (one row per compressor) and roc.csv (compressor,fpr,tpr points)."""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "metrics.csv"), "w") as csv:
+        csv.write(RANKING_CSV_HEADER + "".join(f",top-{k}" for k in ks) + "\n")
+        for compressor, values in metrics.items():
+            csv.write(f"{compressor},{values['queries']},{values['AUC']:.6f},{values['MRR']:.6f}"
+                      + "".join(f",{values[f'top-{k}']:.6f}" for k in ks) + "\n")
+    with open(os.path.join(output_dir, "roc.csv"), "w") as csv:
+        csv.write("compressor,fpr,tpr\n")
+        for compressor, (fpr, tpr) in curves.items():
+            csv.writelines(f"{compressor},{x:.6g},{y:.6g}\n" for x, y in zip(fpr, tpr))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ROC/AUC, top-k accuracy and MRR from full NCD score matrices.")
+    parser.add_argument("--compressors", nargs="+", default=list(COMPRESSORS))
+    parser.add_argument("--scores-dir", default=None, help="load the matrices saved by batch_score.py instead of scoring")
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--save-scores", default=None, help="also save the computed matrices here")
+    parser.add_argument("--output-dir", default="../results/ranking", help="where metrics.csv and roc.csv are written")
+    parser.add_argument("-k", type=int, nargs="+", default=[1, 3, 5], help="k of the top-k accuracies")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    args = parser.parse_args()
+
+    if args.scores_dir:
+        matrices, query_names, database_names = load_matrices(args.scores_dir, args.compressors)
+    else:
+        compressors = available_compressors(args.compressors)
+        missing = set(args.compressors) - set(compressors)
+        if missing:
+            print(f"Skipping compressors without Python bindings: {', '.join(sorted(missing))}")
+        database = load_database(args.db)
+        queries = load_freq_directory(args.queries)
+        query_names = [name for name, _ in queries]
+        database_names = [name for name, _ in database]
+        matrices = score_matrices(database, queries, compressors, args.workers, args.cache_dir)
+        if args.save_scores:
+            save_matrices(matrices, query_names, database_names, args.save_scores)
+
+    start = time.perf_counter()
+    try:
+        metrics, curves = ranking_metrics(matrices, query_names, database_names, args.k)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    write_ranking(args.output_dir, metrics, curves, args.k)
+
+    for compressor, values in metrics.items():
+        print(f"{compressor}: AUC {values['AUC']:.4f}, MRR {values['MRR']:.4f}, "
+              + ", ".join(f"top-{k} {values[f'top-{k}'] * 100:.2f}%" for k in args.k)
+              + f" ({values['queries']} queries)")
+    print(f"Metrics of {len(metrics)} compressors in {elapsed:.3f}s, saved to {args.output_dir}")
@@ -0,0 +1,76 @@
+import os
+import glob
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from match import is_expected_match, parse_query_name
+
+# Formats the identification results can be written in (--format of the scoring scripts)
+RESULTS_FORMATS = ('csv', 'parquet')
+
+def results_path(results_dir, compressor, fmt='csv'):
+    return os.path.join(results_dir, f"results_{compressor}.{fmt}")
+
+def intensity_value(intensity):
+    """Noise intensity as a float, NaN for the 'unknown' of unparsable query names."""
+    try:
+        return float(intensity)
+    except ValueError:
+        return float('nan')
+
+def results_table(query_names, noise_types, intensities, result_codes, result_names, ncds, expected):
+    """
+    Arrow table with the columns of the match binary CSV: query, noise type
+    and matched song dictionary-encoded (the song of each row is an index
+    into result_names), float intensity, float32 NCD and boolean expected.
+    """
+    import pyarrow as pa
+
+    return pa.table({
+        'music query': pa.array(query_names, pa.string()).dictionary_encode(),
+        'noise type': pa.array(noise_types, pa.string()).dictionary_encode(),
+        'noise intensity': pa.array(intensities, pa.float64()),
+        'result': pa.DictionaryArray.from_arrays(pa.array(result_codes, pa.int32()),
+                                                 pa.array(result_names, pa.string())),
+        'NCD': pa.array(np.asarray(ncds, dtype=np.float32)),
+        'expected': pa.array(expected, pa.bool_()),
+    })
+
+def write_results_parquet(matrix, query_names, database_names, output):
+    """Best-match results of a score matrix as Parquet (same rows as write_results_csv)."""
+    import pyarrow.parquet as pq
+
+    best = np.argmin(matrix, axis=1)
+    noise = [parse_query_name(qname) for qname in query_names]
+    table = results_table(query_names, [noise_type for noise_type, _ in noise],
+                          [intensity_value(intensity) for _, intensity in noise], best, database_names,
+                          matrix[np.arange(len(best)), best],
+                          [is_expected_match(qname, database_names[j]) for qname, j in zip(query_names, best)])
+    pq.write_table(table, output, compression='zstd')
+
+def csv_to_parquet(csv_path, output):
+    """Parquet copy of a results CSV (e.g. written by the match binary)."""
+    import pyarrow.parquet as pq
+
+    df = pd.read_csv(csv_path, dtype={'noise type': str, 'noise intensity': str})
+    codes, songs = pd.factorize(df['result'])
+    table = results_table(df['music query'].tolist(), df['noise type'].tolist(),
+                          [intensity_value(intensity) for intensity in df['noise intensity']],
+                          codes, list(songs), df['NCD'].to_numpy(),
+                          (df['expected'].astype(str).str.lower() == 'true').tolist())
+    pq.write_table(table, output, compression='zstd')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert identification result CSVs to Parquet.")
+    parser.add_argument("csvs", nargs="*", help="CSV files (default: ../results/results_*.csv)")
+    parser.add_argument("--output-dir", default=None, help="where the .parquet files go (default: next to each CSV)")
+    args = parser.parse_args()
+
+    for csv_path in args.csvs or sorted(glob.glob("../results/results_*.csv")):
+        output_dir = args.output_dir or os.path.dirname(csv_path)
+        os.makedirs(output_dir or ".", exist_ok=True)
+        output = os.path.join(output_dir, os.path.splitext(os.path.basename(csv_path))[0] + ".parquet")
+        csv_to_parquet(csv_path, output)
+        print(f"{csv_path}: {os.path.getsize(csv_path)} -> {os.path.getsize(output)} bytes ({output})")
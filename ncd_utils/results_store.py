@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from batch_score import init_worker, reference_sizes, score_cells, write_results
+from compressors import COMPRESSORS, available_compressors, compressor_from_string
+from freq_loader import load_database, load_freq_directory
+from ncd import content_hash
+from results_format import RESULTS_FORMATS, results_path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sound_utils"))
+
+from signature_cache import params_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ncd (
+    query TEXT NOT NULL,
+    reference TEXT NOT NULL,
+    compressor TEXT NOT NULL,
+    params TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (query, reference, compressor, params)
+) WITHOUT ROWID
+"""
+
+def unique_signatures(entries):
+    """
+    (hashes, signatures, inverse) of the distinct signatures of (name, data)
+    pairs; entries[i] is signatures[inverse[i]]. Noise variants that end up
+    byte-identical are scored once.
+    """
+    positions = {}
+    hashes = []
+    signatures = []
+    inverse = np.empty(len(entries), dtype=np.int64)
+    for i, (_, data) in enumerate(entries):
+        key = content_hash(data)
+        if key not in positions:
+            positions[key] = len(hashes)
+            hashes.append(key)
+            signatures.append(bytes(data))
+        inverse[i] = positions[key]
+    return hashes, signatures, inverse
+
+class ResultsStore:
+    """
+    SQLite table of every NCD computed, keyed by (query, reference,
+    compressor, extraction parameters).
+
+    Queries and references are identified by a hash of their signature, so a
+    renamed file keeps its results and a re-extracted one gets new ones.
+    Only the pairs that are not stored yet are computed, and the CSVs of the
+    match binary are rebuilt from the table.
+    """
+
+    def __init__(self, path="../results/ncd_store.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def lookup(self, compressor, params, query_hashes, reference_hashes):
+        """queries x references matrix of the stored NCDs, NaN where missing (hashes must be distinct)."""
+        rows = {h: i for i, h in enumerate(query_hashes)}
+        columns = {h: j for j, h in enumerate(reference_hashes)}
+        matrix = np.full((len(query_hashes), len(reference_hashes)), np.nan)
+        cursor = self.connection.execute(
+            "SELECT query, reference, value FROM ncd WHERE compressor = ? AND params = ?", (compressor, params))
+        for query, reference, value in cursor:
+            i = rows.get(query)
+            j = columns.get(reference)
+            if i is not None and j is not None:
+                matrix[i, j] = value
+        return matrix
+
+    def insert(self, compressor, params, query_hashes, reference_hashes, block):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO ncd VALUES (?, ?, ?, ?, ?)",
+                ((q, r, compressor, params, float(block[i, j]))
+                 for i, q in enumerate(query_hashes) for j, r in enumerate(reference_hashes)))
+
+    def update(self, database, queries, compressors, params, workers=None, cache_dir="../ncd_cache"):
+        """
+        Compute and store the missing NCDs of queries x database for every
+        compressor. Queries missing the same references are scored together
+        over a process pool. Returns {compressor: number of NCDs computed}.
+        """
+        query_hashes, query_signatures, _ = unique_signatures(queries)
+        reference_hashes, references, _ = unique_signatures(database)
+
+        tasks = []
+        for compressor in compressors:
+            missing = np.isnan(self.lookup(compressor, params, query_hashes, reference_hashes))
+            groups = defaultdict(list)
+            for i in np.flatnonzero(missing.any(axis=1)):
+                groups[tuple(np.flatnonzero(missing[i]))].append(int(i))
+            if groups:
+                sizes = reference_sizes(references, compressor, cache_dir)
+            for columns, rows in groups.items():
+                tasks.append((compressor, rows, list(columns), sizes[list(columns)]))
+
+        computed = {compressor: 0 for compressor in compressors}
+        if not tasks:
+            return computed
+
+        sets = {'store': (query_signatures, references)}
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(sets,)) as executor:
+            futures = [executor.submit(score_cells, 'store', *task) for task in tasks]
+            for future in as_completed(futures):
+                _, compressor, rows, columns, block = future.result()
+                self.insert(compressor, params, [query_hashes[i] for i in rows],
+                            [reference_hashes[j] for j in columns], block)
+                computed[compressor] += block.size
+        return computed
+
+    def write_csvs(self, database, queries, compressors, params, results_dir="../results", fmt='csv'):
+        """results_<compressor>.<fmt> of the stored NCDs; queries with missing pairs are left out."""
+        query_hashes, _, query_index = unique_signatures(queries)
+        reference_hashes, _, reference_index = unique_signatures(database)
+        query_names = np.array([name for name, _ in queries], dtype=object)
+        database_names = [name for name, _ in database]
+
+        os.makedirs(results_dir, exist_ok=True)
+        for compressor in compressors:
+            matrix = self.lookup(compressor, params, query_hashes, reference_hashes)[np.ix_(query_index, reference_index)]
+            complete = ~np.isnan(matrix).any(axis=1)
+            if not complete.all():
+                print(f"{compressor}: {int((~complete).sum())} queries have missing NCDs and are left out")
+            write_results(matrix[complete], list(query_names[complete]), database_names,
+                          results_path(results_dir, compressor, fmt))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental NCD results store and CSV export.")
+    parser.add_argument("--store", default="../results/ncd_store.sqlite", help="SQLite file of the results")
+    parser.add_argument("--compressors", nargs="+", default=list(COMPRESSORS))
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--results-dir", default="../results", help="where the CSVs are written")
+    parser.add_argument("--format", choices=RESULTS_FORMATS, default="csv", help="format of the exported results")
+    parser.add_argument("--csv-only", action="store_true", help="only export the CSVs, do not compute missing pairs")
+    parser.add_argument("--no-csv", action="store_true", help="only compute the missing pairs")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    parser.add_argument("--ws", type=int, default=1024, help="window size the signatures were extracted with")
+    parser.add_argument("--sh", type=int, default=256, help="window shift")
+    parser.add_argument("--ds", type=int, default=4, help="downsampling factor")
+    parser.add_argument("--nf", type=int, default=4, help="number of significant frequencies")
+    args = parser.parse_args()
+
+    compressors = [compressor_from_string(c) for c in args.compressors]
+    if not args.csv_only:
+        compressors = available_compressors(compressors)
+        missing = set(args.compressors) - set(compressors)
+        if missing:
+            print(f"Skipping compressors without Python bindings: {', '.join(sorted(missing))}")
+
+    params = params_key(args.ws, args.sh, args.ds, args.nf)
+    database = load_database(args.db)
+    queries = load_freq_directory(args.queries)
+    store = ResultsStore(args.store)
+
+    if not args.csv_only:
+        start = time.perf_counter()
+        computed = store.update(database, queries, compressors, params, args.workers, args.cache_dir)
+        print(", ".join(f"{c}: {n} new NCDs" for c, n in computed.items())
+              + f" ({time.perf_counter() - start:.2f}s)")
+    if not args.no_csv:
+        store.write_csvs(database, queries, compressors, params, args.results_dir, args.format)
+        print(f"CSVs written to {args.results_dir}")
+    store.close()
@@ -0,0 +1,135 @@
+import os
+import time
+import argparse
+
+import numpy as np
+
+from freq_loader import load_database, load_freq_directory
+from match import CSV_HEADER, csv_row, format_ncd
+from early import EarlyStopMatcher
+from ncd import NCDMatcher
+from prefilter import CandidateIndex
+
+# get_max_freqs defaults: one window of nf bins every sh samples of the signal downsampled by ds
+DEFAULT_NF = 4
+DEFAULT_SH = 256
+DEFAULT_DS = 4
+SAMPLE_RATE = 44100
+
+WINDOWED_CSV_HEADER = CSV_HEADER.rstrip("\n") + ",offset\n"
+
+def frames_to_seconds(frames, sh=DEFAULT_SH, ds=DEFAULT_DS, sample_rate=SAMPLE_RATE):
+    return frames * sh * ds / sample_rate
+
+def seconds_to_frames(seconds, sh=DEFAULT_SH, ds=DEFAULT_DS, sample_rate=SAMPLE_RATE):
+    return max(1, int(round(seconds * sample_rate / (ds * sh))))
+
+def window_starts(n_frames, window, hop):
+    """First frame of every window; the last one is aligned with the end of the signature."""
+    if n_frames <= window:
+        return [0]
+    starts = list(range(0, n_frames - window + 1, hop))
+    if starts[-1] != n_frames - window:
+        starts.append(n_frames - window)
+    return starts
+
+def split_windows(database, window, hop, nf=DEFAULT_NF):
+    """(song index, start frame, window bytes) of overlapping windows of every database entry."""
+    windows = []
+    for song, (_, data) in enumerate(database):
+        for start in window_starts(len(data) // nf, window, hop):
+            windows.append((song, start, data[start * nf:(start + window) * nf]))
+    return windows
+
+class WindowedMatcher:
+    """
+    NCD matching against overlapping windows of about the query length.
+
+    Every database signature is cut into windows of `window` frames every
+    `hop` frames; C(y) of each window is computed once (and kept in the
+    SizeCache). A query is scored against the windows, so the NCD is not
+    dominated by the length of the song, and the best window gives the time
+    offset of the query in the song. With top_k, only the windows shortlisted
+    by a CandidateIndex over the windows get an exact NCD; with early, the
+    windows are searched by an EarlyStopMatcher.
+    """
+
+    def __init__(self, database, compressor, window, hop=None, nf=DEFAULT_NF, cache_dir="../ncd_cache", top_k=None,
+                 early=False):
+        self.names = [name for name, _ in database]
+        self.window = window
+        self.hop = hop or max(1, window // 2)
+        self.nf = nf
+        self.top_k = top_k
+
+        windows = split_windows(database, self.window, self.hop, nf)
+        self.songs = np.array([song for song, _, _ in windows], dtype=np.int64)
+        self.starts = np.array([start for _, start, _ in windows], dtype=np.int64)
+        entries = [(f"{self.names[song]}@{start}", data) for song, start, data in windows]
+        self.matcher = (EarlyStopMatcher if early else NCDMatcher)(entries, compressor, cache_dir)
+        self.index = CandidateIndex(entries, nf) if top_k else None
+
+    def __len__(self):
+        return len(self.songs)
+
+    def best_match(self, query):
+        """(song name, offset in frames, NCD) of the closest window."""
+        if self.index is not None:
+            candidates = np.sort(self.index.shortlist(query, self.top_k))
+            ncds = self.matcher.score(query, candidates)
+            best, best_ncd = int(candidates[np.argmin(ncds)]), float(ncds.min())
+        elif isinstance(self.matcher, EarlyStopMatcher):
+            best, best_ncd, _, _ = self.matcher.search(query)
+        else:
+            ncds = self.matcher.score(query)
+            best = int(np.argmin(ncds))
+            best_ncd = float(ncds[best])
+        return self.names[self.songs[best]], int(self.starts[best]), best_ncd
+
+def run_batch(matcher, queries, output_csv):
+    """Score every query and write the identification CSV with an extra offset column (seconds)."""
+    os.makedirs(os.path.dirname(output_csv) or ".", exist_ok=True)
+    with open(output_csv, "w") as csv:
+        csv.write(WINDOWED_CSV_HEADER)
+        for qname, qdata in queries:
+            best_match, offset, best_ncd = matcher.best_match(qdata)
+            seconds = frames_to_seconds(offset)
+            print(f"Query: {qname} => Best Match: {best_match} at {seconds:.1f}s (NCD = {format_ncd(best_ncd)})")
+            csv.write(csv_row(qname, best_match, best_ncd).rstrip("\n") + f",{seconds:.2f}\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Music identification and localisation by NCD against song windows.")
+    parser.add_argument("--compressor", default="gzip")
+    parser.add_argument("--db", default="../database/", help="folder of .freqs files or packed database")
+    parser.add_argument("--queries", default="../queries/", help="folder of query .freqs files")
+    parser.add_argument("--output", default=None, help="output CSV (default: ../results/results_windowed_<compressor>.csv)")
+    parser.add_argument("--window", type=float, default=None, help="window length in seconds (default: length of the first query)")
+    parser.add_argument("--hop", type=float, default=None, help="hop between windows in seconds (default: half a window)")
+    parser.add_argument("--top-k", type=int, default=None, help="only score the K best pre-filter windows")
+    parser.add_argument("--early", action="store_true", help="stop compressing windows that cannot beat the best one (gzip)")
+    parser.add_argument("--cache-dir", default="../ncd_cache", help="where C(y) sizes are persisted")
+    args = parser.parse_args()
+
+    database = load_database(args.db)
+    queries = load_freq_directory(args.queries)
+    if not queries:
+        print(f"No queries found in {args.queries}")
+        raise SystemExit(1)
+
+    window = seconds_to_frames(args.window) if args.window else len(queries[0][1]) // DEFAULT_NF
+    hop = seconds_to_frames(args.hop) if args.hop else None
+
+    start = time.perf_counter()
+    try:
+        matcher = WindowedMatcher(database, args.compressor, window, hop, cache_dir=args.cache_dir, top_k=args.top_k,
+                                  early=args.early)
+    except ValueError as e:
+        print(e)
+        raise SystemExit(1)
+    print(f"{len(matcher)} windows of {frames_to_seconds(window):.1f}s every {frames_to_seconds(matcher.hop):.1f}s "
+          f"({time.perf_counter() - start:.2f}s to build)")
+
+    start = time.perf_counter()
+    run_batch(matcher, queries, args.output or f"../results/results_windowed_{args.compressor}.csv")
+    elapsed = time.perf_counter() - start
+    print(f"{len(queries)} queries in {elapsed:.2f}s ({elapsed / len(queries) * 1000:.1f} ms per query)")
@@ -0,0 +1,145 @@
+import os
+import sys
+import glob
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ncd_utils"))
+
+from query_names import QUERY_PATTERN
+
+# Genre queries are named <genre>_<anything>.freqs
+GENRE_PATTERN = r'^([a-zA-Z]+)_'
+
+def parse_queries(queries):
+    """
+    Original song file, segment, noise type and intensity of every query name
+    (NaN where the name does not follow QUERY_PATTERN). Each distinct name is
+    parsed once, however many compressors' results it appears in.
+    """
+    if isinstance(queries.dtype, pd.CategoricalDtype):
+        codes, names = queries.cat.codes.to_numpy(), queries.cat.categories
+    else:
+        codes, names = pd.factorize(queries)
+    parsed = pd.Series(names, dtype=object).str.extract(QUERY_PATTERN)
+    parsed['original'] = parsed['original'] + '.freqs'
+    parsed['segment'] = pd.to_numeric(parsed['segment'])
+    parsed['intensity'] = pd.to_numeric(parsed['intensity'])
+    # Rows of missing names (code -1) pick the all-NaN row appended at the end
+    parsed = parsed.reindex(range(len(names) + 1))
+    parsed = parsed.iloc[np.where(codes < 0, len(names), codes)]
+    parsed.index = queries.index
+    return parsed
+
+def add_query_info(df):
+    """
+    Add original_query, extracted_noise_type, extracted_intensity and
+    is_correct (the original song is the result) to an identification
+    results frame. Names that do not parse keep the query as original_query
+    (the same rule as ncd_utils/query_names.py).
+    """
+    parsed = parse_queries(df['music query'])
+    stripped = parsed['original'].notna()
+    df['original_query'] = parsed['original'].where(stripped, df['music query'])
+    df['extracted_noise_type'] = parsed['noise']
+    df['extracted_intensity'] = parsed['intensity']
+    df['is_correct'] = df['original_query'] == df['result']
+    return df
+
+def wilson_interval(correct, total, z=1.96):
+    """95% Wilson score interval of correct/total, in percent and clipped to [0, 100] (arrays accepted)."""
+    correct = np.asarray(correct, dtype=float)
+    total = np.asarray(total, dtype=float)
+    p = correct / total
+    center = (p + z**2 / (2 * total)) / (1 + z**2 / total)
+    margin = z * np.sqrt((p * (1 - p) + z**2 / (4 * total)) / total) / (1 + z**2 / total)
+    return np.maximum(0, (center - margin) * 100), np.minimum(100, (center + margin) * 100)
+
+def accuracy_table(df, by):
+    """
+    correct, total, accuracy (%) and Wilson interval of is_correct for every
+    group of `by`, in a single groupby (groups in order of appearance).
+    """
+    table = (df.groupby(by, sort=False, observed=True)['is_correct']
+               .agg(correct='sum', total='count')
+               .reset_index())
+    table['accuracy'] = table['correct'] / table['total'] * 100
+    table['ci_lower'], table['ci_upper'] = wilson_interval(table['correct'], table['total'])
+    return table
+
+def read_results(path, usecols=None):
+    """
+    One results file: the CSV of the match binary, or its Parquet version
+    (ncd_utils/results_format.py), whose names load as categoricals.
+    """
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=usecols)
+    return pd.read_csv(path, usecols=usecols)
+
+def results_files(results_folder, pattern="*"):
+    """
+    .csv and .parquet results of a folder, in glob order; a .parquet
+    replaces the .csv of the same name.
+    """
+    csv_files = glob.glob(os.path.join(results_folder, pattern + ".csv"))
+    parquet_files = glob.glob(os.path.join(results_folder, pattern + ".parquet"))
+    parquet_stems = {os.path.splitext(f)[0]: f for f in parquet_files}
+    files = [parquet_stems.pop(os.path.splitext(f)[0], f) for f in csv_files]
+    return files + [f for f in parquet_files if os.path.splitext(f)[0] in parquet_stems]
+
+def compressor_name(csv_file, prefix=""):
+    """Compressor of a results CSV: the file name without prefix and extension."""
+    name = os.path.splitext(os.path.basename(csv_file))[0]
+    return name[len(prefix):] if prefix and name.startswith(prefix) else name
+
+def load_results(csv_files, prefix="", usecols=None, required=()):
+    """
+    All results files in one frame with a categorical `compressor` column, in
+    the order of csv_files (files that cannot be read or lack a required
+    column are reported and skipped).
+    """
+    frames = []
+    for csv_file in csv_files:
+        try:
+            df = read_results(csv_file, usecols)
+            for column in required:
+                if column not in df.columns:
+                    raise KeyError(column)
+        except Exception as e:
+            print(f"Error processing {csv_file}: {e}")
+            continue
+        df['compressor'] = compressor_name(csv_file, prefix)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    # Names of Parquet results stay categorical, over the union of the files' categories
+    for column in frames[0].columns:
+        columns = [df[column] for df in frames if column in df]
+        if all(isinstance(values.dtype, pd.CategoricalDtype) for values in columns):
+            categories = union_categoricals(columns).categories
+            for df in frames:
+                if column in df:
+                    df[column] = df[column].cat.set_categories(categories)
+    results = pd.concat(frames, ignore_index=True)
+    results['compressor'] = pd.Categorical(results['compressor'], categories=list(dict.fromkeys(results['compressor'])))
+    return results
+
+def load_results_folder(results_folder, pattern="*", prefix="", usecols=None, required=()):
+    return load_results(results_files(results_folder, pattern), prefix, usecols, required)
+
+def genre_accuracy(df):
+    """
+    {compressor: accuracy} of genre results: the query prefix before the
+    first '_' (letters only, case-insensitive) must be the identified genre.
+    Queries without such a prefix are not counted.
+    """
+    expected = df['music query'].astype('string').str.extract(GENRE_PATTERN, expand=False).str.lower()
+    identified = df['identified genre'].astype('string').str.lower()
+    valid = expected.notna()
+    correct = (expected == identified).fillna(False) & valid
+    grouped = pd.DataFrame({'compressor': df['compressor'], 'correct': correct, 'valid': valid})
+    counts = grouped.groupby('compressor', sort=False, observed=False)[['correct', 'valid']].sum()
+    accuracy = (counts['correct'] / counts['valid']).where(counts['valid'] > 0, 0.0)
+    return {compressor: float(value) for compressor, value in accuracy.items()}
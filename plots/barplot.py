@@ -1,67 +1,42 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-import os
-import glob
 import numpy as np
 
-def extract_original_filename(query_filename):
-    """Extract original filename from augmented filename."""
-    import re
-    # Remove the noise pattern: _{noise_type}_intensity_{value}.freqs
-    pattern = r'_segment(1|2|3|4|5|6|7|8|9|10)_(white|pink|brown)_intensity_[\d.]+\.freqs$'
-    original_name = re.sub(pattern, '.freqs', query_filename)
-    return original_name
-
-def calculate_accuracy(df):
-    """Calculate accuracy by comparing original filenames."""
-    if df.empty:
-        return 0, 0, 0
-    
-    # Extract original filenames from queries
-    df['original_query'] = df['music query'].apply(extract_original_filename)
-    
-    # Check if prediction is correct (query matches result)
-    df['is_correct'] = df['original_query'] == df['result']
-    
-    total_queries = len(df)
-    correct_predictions = df['is_correct'].sum()
-    accuracy = (correct_predictions / total_queries) * 100 if total_queries > 0 else 0
-    
-    return accuracy, correct_predictions, total_queries
+from analysis import accuracy_table, add_query_info, load_results, results_files
 
 def process_results_folder(results_folder):
     """Process all CSV files in the results folder."""
     compressor_results = {}
     
-    # Find all CSV files in the results folder
-    csv_files = glob.glob(os.path.join(results_folder, "*.csv"))
+    # Read all CSV (or Parquet) results of the folder into one frame
+    csv_files = results_files(results_folder)
     
     if not csv_files:
-        print(f"No CSV files found in {results_folder}")
+        print(f"No result files found in {results_folder}")
         return compressor_results
     
-    for csv_file in csv_files:
-        try:
-            # Extract compressor name from filename
-            compressor_name = os.path.splitext(os.path.basename(csv_file))[0]
-            
-            # Read CSV file
-            df = pd.read_csv(csv_file)
-            
-            # Calculate accuracy
-            accuracy, correct, total = calculate_accuracy(df)
-            
-            compressor_results[compressor_name] = {
-                'accuracy': accuracy,
-                'correct': correct,
-                'total': total,
-                'data': df
-            }
-            
-            print(f"{compressor_name}: {accuracy:.2f}% ({correct}/{total})")
-            
-        except Exception as e:
-            print(f"Error processing {csv_file}: {e}")
+    results = load_results(csv_files, required=('music query', 'result'))
+    if results.empty:
+        return compressor_results
+    
+    # Parse every query name once and count correct predictions per compressor in one groupby
+    add_query_info(results)
+    table = accuracy_table(results, 'compressor').set_index('compressor')
+    
+    for compressor_name, df in results.groupby('compressor', sort=False, observed=False):
+        if compressor_name in table.index:
+            accuracy, correct, total = table.loc[compressor_name, ['accuracy', 'correct', 'total']]
+            correct, total = int(correct), int(total)
+        else:
+            accuracy, correct, total = 0, 0, 0
+        
+        compressor_results[compressor_name] = {
+            'accuracy': accuracy,
+            'correct': correct,
+            'total': total,
+            'data': df.drop(columns='compressor')
+        }
+        
+        print(f"{compressor_name}: {accuracy:.2f}% ({correct}/{total})")
     
     return compressor_results
 
@@ -147,7 +122,7 @@ def create_detailed_analysis(compressor_results, save_path=None):
         for noise_type in ['white', 'pink', 'brown']:
             noise_df = df[df['noise type'] == noise_type]
             if not noise_df.empty:
-                acc, _, _ = calculate_accuracy(noise_df)
+                acc = noise_df['is_correct'].mean() * 100
                 if noise_type not in noise_accuracy:
                     noise_accuracy[noise_type] = []
                 noise_accuracy[noise_type].append(acc)
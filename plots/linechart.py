@@ -1,28 +1,8 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
-import glob
-import numpy as np
-from collections import defaultdict
 from scipy import stats
 
-def extract_original_filename(query_filename):
-    """Extract original filename from augmented filename."""
-    import re
-    pattern = r'_segment\d+_(white|pink|brown)_intensity_[\d.]+\.freqs$'
-    original_name = re.sub(pattern, '.freqs', query_filename)
-    return original_name
-
-def extract_noise_info(query_filename):
-    """Extract noise type and intensity from filename."""
-    import re
-    pattern = r'.*_segment\d+_(white|pink|brown)_intensity_([\d.]+)\.freqs$'
-    match = re.search(pattern, query_filename)
-    if match:
-        noise_type = match.group(1)
-        intensity = float(match.group(2))
-        return noise_type, intensity
-    return None, None
+from analysis import accuracy_table, add_query_info, load_results, results_files
 
 def calculate_accuracy_with_statistics(df, compressor_name):
     """Calculate accuracy with statistical analysis."""
@@ -30,11 +10,7 @@ def calculate_accuracy_with_statistics(df, compressor_name):
         return {}
     
     # Extract information
-    df['original_query'] = df['music query'].apply(extract_original_filename)
-    noise_info = df['music query'].apply(extract_noise_info)
-    df['extracted_noise_type'] = [info[0] for info in noise_info]
-    df['extracted_intensity'] = [info[1] for info in noise_info]
-    df['is_correct'] = df['original_query'] == df['result']
+    add_query_info(df)
     
     # Remove invalid data
     valid_df = df.dropna(subset=['extracted_noise_type', 'extracted_intensity'])
@@ -42,47 +18,19 @@ def calculate_accuracy_with_statistics(df, compressor_name):
     if len(valid_df) == 0:
         return {}
     
+    return noise_statistics(accuracy_table(valid_df, ['extracted_noise_type', 'extracted_intensity']), compressor_name)
+
+def noise_statistics(table, compressor_name):
+    """Statistical analysis per noise type of the accuracy_table rows of one compressor."""
     results = {}
     
-    for noise_type in valid_df['extracted_noise_type'].unique():
-        if pd.isna(noise_type) or noise_type == '':
-            continue
-            
-        noise_df = valid_df[valid_df['extracted_noise_type'] == noise_type]
-        
+    for noise_type, noise_rows in table.groupby('extracted_noise_type', sort=False):
         # Collect data for analysis
-        intensities = []
-        accuracies = []
-        sample_counts = []
-        confidence_intervals = []
-        
-        for intensity in sorted(noise_df['extracted_intensity'].unique()):
-            if pd.isna(intensity):
-                continue
-                
-            intensity_df = noise_df[noise_df['extracted_intensity'] == intensity]
-            if not intensity_df.empty:
-                correct_count = intensity_df['is_correct'].sum()
-                total_count = len(intensity_df)
-                accuracy = (correct_count / total_count) * 100
-                
-                # Calculate confidence interval using Wilson score interval
-                if total_count > 0:
-                    p = correct_count / total_count
-                    n = total_count
-                    z = 1.96  # 95% confidence
-                    
-                    # Wilson score interval
-                    center = (p + z**2/(2*n)) / (1 + z**2/n)
-                    margin = z * np.sqrt((p*(1-p) + z**2/(4*n)) / n) / (1 + z**2/n)
-                    
-                    ci_lower = max(0, (center - margin) * 100)
-                    ci_upper = min(100, (center + margin) * 100)
-                    
-                    intensities.append(intensity)
-                    accuracies.append(accuracy)
-                    sample_counts.append(total_count)
-                    confidence_intervals.append((ci_lower, ci_upper))
+        noise_rows = noise_rows.sort_values('extracted_intensity')
+        intensities = noise_rows['extracted_intensity'].tolist()
+        accuracies = noise_rows['accuracy'].tolist()
+        sample_counts = noise_rows['total'].tolist()
+        confidence_intervals = list(zip(noise_rows['ci_lower'].tolist(), noise_rows['ci_upper'].tolist()))
         
         if len(intensities) > 1:
             # Analyze the trend
@@ -181,6 +129,61 @@ def calculate_accuracy_with_statistics(df, compressor_name):
     
     return results
 
+def create_noise_figure(compressor_results, noise_type):
+    """Accuracy vs intensity of one noise type for every compressor, with confidence intervals."""
+    fig = plt.figure(figsize=(14, 8))
+    
+    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', 
+              '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+    
+    legend_info = []
+    
+    for i, (compressor_name, comp_data) in enumerate(compressor_results.items()):
+        if noise_type in comp_data:
+            data = comp_data[noise_type]
+            intensities = sorted(data['accuracy_data'].keys())
+            accuracies = [data['accuracy_data'][intensity] for intensity in intensities]
+            cis = [data['confidence_intervals'][intensity] for intensity in intensities]
+            
+            # Plot main line
+            plt.plot(intensities, [acc/100 for acc in accuracies], 
+                    marker='o', linewidth=2, markersize=8, 
+                    color=colors[i % len(colors)], alpha=0.8, label=compressor_name)
+            
+            # Plot confidence intervals
+            ci_lower = [ci[0]/100 for ci in cis]
+            ci_upper = [ci[1]/100 for ci in cis]
+            plt.fill_between(intensities, ci_lower, ci_upper, 
+                           color=colors[i % len(colors)], alpha=0.2)
+            
+            # Add trend info to legend
+            stats_data = data['statistics']
+            r = stats_data['correlation']
+            p_val = stats_data['trend_p_value']
+            trend_sig = "*" if p_val < 0.05 else ""
+            legend_info.append(f"{compressor_name} (r={r:.2f}{trend_sig})")
+    
+    # Customize plot
+    plt.xlabel('Noise Intensity', fontsize=12, fontweight='bold')
+    plt.ylabel('Accuracy', fontsize=12, fontweight='bold')
+    plt.title(f'Accuracy vs {noise_type.title()} Noise Intensity\n(with 95% confidence intervals)', 
+              fontsize=14, fontweight='bold')
+    
+    plt.ylim(0, 1.0)
+    plt.grid(True, alpha=0.3, linestyle='--')
+    plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda y, _: f'{y:.1%}'))
+    
+    # Enhanced legend
+    plt.legend(legend_info, title='Compressor (correlation*=significant)', 
+              loc='best', framealpha=0.9)
+    
+    # Add note about statistical significance
+    plt.figtext(0.02, 0.02, "* = statistically significant trend (p < 0.05)\nShaded areas = 95% confidence intervals", 
+               fontsize=9, style='italic')
+    
+    plt.tight_layout()
+    return fig
+
 def create_enhanced_plots(compressor_results, save_dir=None):
     """Create plots with confidence intervals and statistical information."""
     if save_dir:
@@ -192,57 +195,7 @@ def create_enhanced_plots(compressor_results, save_dir=None):
         noise_types.update(comp_data.keys())
     
     for noise_type in sorted(noise_types):
-        plt.figure(figsize=(14, 8))
-        
-        colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', 
-                  '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
-        
-        legend_info = []
-        
-        for i, (compressor_name, comp_data) in enumerate(compressor_results.items()):
-            if noise_type in comp_data:
-                data = comp_data[noise_type]
-                intensities = sorted(data['accuracy_data'].keys())
-                accuracies = [data['accuracy_data'][intensity] for intensity in intensities]
-                cis = [data['confidence_intervals'][intensity] for intensity in intensities]
-                
-                # Plot main line
-                plt.plot(intensities, [acc/100 for acc in accuracies], 
-                        marker='o', linewidth=2, markersize=8, 
-                        color=colors[i % len(colors)], alpha=0.8, label=compressor_name)
-                
-                # Plot confidence intervals
-                ci_lower = [ci[0]/100 for ci in cis]
-                ci_upper = [ci[1]/100 for ci in cis]
-                plt.fill_between(intensities, ci_lower, ci_upper, 
-                               color=colors[i % len(colors)], alpha=0.2)
-                
-                # Add trend info to legend
-                stats_data = data['statistics']
-                r = stats_data['correlation']
-                p_val = stats_data['trend_p_value']
-                trend_sig = "*" if p_val < 0.05 else ""
-                legend_info.append(f"{compressor_name} (r={r:.2f}{trend_sig})")
-        
-        # Customize plot
-        plt.xlabel('Noise Intensity', fontsize=12, fontweight='bold')
-        plt.ylabel('Accuracy', fontsize=12, fontweight='bold')
-        plt.title(f'Accuracy vs {noise_type.title()} Noise Intensity\n(with 95% confidence intervals)', 
-                  fontsize=14, fontweight='bold')
-        
-        plt.ylim(0, 1.0)
-        plt.grid(True, alpha=0.3, linestyle='--')
-        plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda y, _: f'{y:.1%}'))
-        
-        # Enhanced legend
-        plt.legend(legend_info, title='Compressor (correlation*=significant)', 
-                  loc='best', framealpha=0.9)
-        
-        # Add note about statistical significance
-        plt.figtext(0.02, 0.02, "* = statistically significant trend (p < 0.05)\nShaded areas = 95% confidence intervals", 
-                   fontsize=9, style='italic')
-        
-        plt.tight_layout()
+        create_noise_figure(compressor_results, noise_type)
         
         if save_dir:
             save_path = os.path.join(save_dir, f"enhanced_accuracy_{noise_type}.png")
@@ -251,6 +204,23 @@ def create_enhanced_plots(compressor_results, save_dir=None):
         
         plt.show()
 
+def compressor_statistics(csv_files):
+    """{compressor: noise_statistics} of all results files, parsed once and grouped in one groupby."""
+    compressor_results = {}
+    
+    results = load_results(csv_files, required=('music query', 'result'))
+    if not results.empty:
+        add_query_info(results)
+        valid = results.dropna(subset=['extracted_noise_type', 'extracted_intensity'])
+        table = accuracy_table(valid, ['compressor', 'extracted_noise_type', 'extracted_intensity'])
+        
+        for compressor_name in results['compressor'].cat.categories:
+            results_compressor = noise_statistics(table[table['compressor'] == compressor_name], compressor_name)
+            if results_compressor:
+                compressor_results[compressor_name] = results_compressor
+    
+    return compressor_results
+
 def main():
     results_folder = "../results"
     
@@ -258,20 +228,7 @@ def main():
     print("=" * 70)
     
     # Process files
-    csv_files = glob.glob(os.path.join(results_folder, "*.csv"))
-    compressor_results = {}
-    
-    for csv_file in csv_files:
-        try:
-            compressor_name = os.path.splitext(os.path.basename(csv_file))[0]
-            df = pd.read_csv(csv_file)
-            
-            results = calculate_accuracy_with_statistics(df, compressor_name)
-            if results:
-                compressor_results[compressor_name] = results
-                
-        except Exception as e:
-            print(f"Error processing {csv_file}: {e}")
+    compressor_results = compressor_statistics(results_files(results_folder))
     
     if compressor_results:
         print(f"\n" + "=" * 70)
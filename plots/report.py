@@ -0,0 +1,149 @@
+import matplotlib
+matplotlib.use("Agg")
+
+import io
+import os
+import json
+import time
+import hashlib
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+
+from analysis import results_files
+from genre_accuracy_plot import create_genre_figure, genre_accuracies, genre_results_files
+from linechart import compressor_statistics, create_noise_figure
+from roc_plots import plot_ranking_roc, plot_roc_true_vs_false
+
+INDEX_FILE = "report_index.json"
+
+# Editing any of these renders every figure again
+SOURCES = ("analysis.py", "linechart.py", "roc_plots.py", "genre_accuracy_plot.py", "report.py",
+           os.path.join("..", "ncd_utils", "query_names.py"))
+
+def files_digest(paths):
+    """Hash of the names and contents of files."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(os.path.basename(path).encode() + b"\0")
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def load_index(output_dir):
+    try:
+        with open(os.path.join(output_dir, INDEX_FILE)) as f:
+            return json.load(f)["figures"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def save_index(output_dir, figures):
+    path = os.path.join(output_dir, INDEX_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"generated": time.strftime("%Y-%m-%d %H:%M:%S"), "figures": figures}, f, indent=2)
+    os.replace(tmp_path, path)
+
+def figure_groups(results_dir):
+    """(name, input files) of every group of figures: noise accuracy, genre accuracy, one ROC per results file and the ranking ROC."""
+    files = sorted(results_files(results_dir))
+    groups = []
+    if files:
+        groups.append(("noise accuracy", files))
+    genre_dir = os.path.join(results_dir, "genre")
+    genre_files = sorted(genre_results_files(genre_dir)) if os.path.isdir(genre_dir) else []
+    if genre_files:
+        groups.append(("genre accuracy", genre_files))
+    for path in files:
+        groups.append((f"roc {os.path.splitext(os.path.basename(path))[0]}", [path]))
+    ranking_roc = os.path.join(results_dir, "ranking", "roc.csv")
+    if os.path.exists(ranking_roc):
+        groups.append(("ranking roc", [ranking_roc]))
+    return groups
+
+def render_tasks(name, inputs, output_dir):
+    """(kind, data, output) of the figures of a group; the statistics are computed here, once."""
+    if name == "noise accuracy":
+        with contextlib.redirect_stdout(io.StringIO()):
+            compressor_results = compressor_statistics(inputs)
+        noise_types = sorted({noise for comp_data in compressor_results.values() for noise in comp_data})
+        return [("noise", (compressor_results, noise),
+                 os.path.join(output_dir, "statistical_plots", f"enhanced_accuracy_{noise}.png")) for noise in noise_types]
+    if name == "genre accuracy":
+        return [("genre", genre_accuracies(inputs), os.path.join(output_dir, "genre_accuracy.png"))]
+    if name == "ranking roc":
+        return [("ranking", inputs[0], os.path.join(output_dir, "roc_plots", "ranking_roc.png"))]
+    stem = os.path.splitext(os.path.basename(inputs[0]))[0]
+    return [("roc", inputs[0], os.path.join(output_dir, "roc_plots", f"{stem}_roc.png"))]
+
+def render_figure(task):
+    """Render and save one figure on the Agg backend (run in the worker processes)."""
+    kind, data, output = task
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    if kind == "noise":
+        fig = create_noise_figure(*data)
+        fig.savefig(output, dpi=300, bbox_inches='tight')
+        plt.close(fig)
+    elif kind == "genre":
+        fig = create_genre_figure(data)
+        fig.savefig(output)
+        plt.close(fig)
+    elif kind == "ranking":
+        with contextlib.redirect_stdout(io.StringIO()):
+            plot_ranking_roc(data, output)
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            plot_roc_true_vs_false(data, os.path.dirname(output))
+    return output
+
+def report(results_dir="../results", output_dir=".", workers=None, force=False):
+    """
+    Render every figure of plots/ whose inputs (or plotting code) changed
+    since the last report, over a process pool, and write INDEX_FILE listing
+    all figures with their inputs. Returns (rendered, skipped) figure counts.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    sources = files_digest([os.path.join(script_dir, source) for source in SOURCES])
+    os.makedirs(output_dir, exist_ok=True)
+    previous = load_index(output_dir)
+
+    figures = {}
+    tasks = []
+    skipped = 0
+    for name, inputs in figure_groups(results_dir):
+        key = files_digest(inputs) + sources
+        entry = previous.get(name)
+        if (not force and entry and entry["key"] == key
+                and all(os.path.exists(os.path.join(output_dir, output)) for output in entry["outputs"])):
+            figures[name] = entry
+            skipped += len(entry["outputs"])
+            continue
+        group_tasks = render_tasks(name, inputs, output_dir)
+        tasks.extend(group_tasks)
+        figures[name] = {"key": key, "inputs": inputs,
+                         "outputs": [os.path.relpath(output, output_dir) for _, _, output in group_tasks]}
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(render_figure, tasks))
+
+    # Figures the plotting code declined to draw (e.g. a CSV without NCDs) are not listed
+    for entry in figures.values():
+        entry["outputs"] = [output for output in entry["outputs"] if os.path.exists(os.path.join(output_dir, output))]
+    save_index(output_dir, figures)
+    return len(tasks), skipped
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render all plots headless, skipping those whose results did not change.")
+    parser.add_argument("--results-dir", default="../results", help="folder of the identification results (and genre/)")
+    parser.add_argument("--output-dir", default=".", help="where the figures and the index are written")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="render every figure, even if its inputs did not change")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rendered, skipped = report(args.results_dir, args.output_dir, args.workers, args.force)
+    print(f"{rendered} figures rendered, {skipped} unchanged in {time.perf_counter() - start:.2f}s; "
+          f"index written to {os.path.join(args.output_dir, INDEX_FILE)}")
@@ -2,10 +2,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from sklearn.metrics import roc_curve, auc
 import os
-from glob import glob
+
+from analysis import read_results, results_files
 
 def plot_roc_true_vs_false(csv_path, output_dir):
-    df = pd.read_csv(csv_path)
+    df = read_results(csv_path)
 
     required_cols = ["result", "NCD", "expected"]
     if not all(col in df.columns for col in required_cols):
@@ -41,19 +42,45 @@ def plot_roc_true_vs_false(csv_path, output_dir):
     plt.close()
     print(f"Saved ROC plot to {output_path}")
 
+def plot_ranking_roc(roc_csv, output_path):
+    """ROC of every compressor over all (query, song) pairs, from ncd_utils/ranking.py's roc.csv."""
+    df = pd.read_csv(roc_csv)
+
+    plt.figure(figsize=(8, 6))
+    for compressor, curve in df.groupby("compressor", sort=False):
+        roc_auc = auc(curve["fpr"], curve["tpr"])
+        plt.plot(curve["fpr"], curve["tpr"], lw=2, label=f"{compressor} (AUC = {roc_auc:.3f})")
+    plt.plot([0, 1], [0, 1], 'k--', label='Random classifier')
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('False Positive Rate')
+    plt.ylabel('True Positive Rate')
+    plt.title('ROC Curve — all query/song pairs of the score matrices')
+    plt.legend(loc="lower right")
+    plt.grid(True)
+    plt.tight_layout()
+
+    plt.savefig(output_path)
+    plt.close()
+    print(f"Saved ROC plot to {output_path}")
+
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))  # Define script_dir here
     input_dir = os.path.join(script_dir, "../results")
     output_dir = os.path.join(script_dir, "roc_plots")
     os.makedirs(output_dir, exist_ok=True)
 
-    csv_files = glob(os.path.join(input_dir, "*.csv"))
+    csv_files = results_files(input_dir)
     if not csv_files:
-        print(f"No CSV files found in {input_dir}.")
+        print(f"No result files found in {input_dir}.")
         return
 
     for csv_file in csv_files:
         plot_roc_true_vs_false(csv_file, output_dir)
 
+    ranking_roc = os.path.join(input_dir, "ranking", "roc.csv")
+    if os.path.exists(ranking_roc):
+        plot_ranking_roc(ranking_roc, os.path.join(output_dir, "ranking_roc.png"))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import soundfile as sf
+
+from get_max_freqs import get_max_freqs, write_signature_to_file, stream_signature_to_file
+from signature_cache import DEFAULT_PARAMS, SignatureCache, params_key
+
+# Written in every output folder: {output file name: extraction parameters (params_key)}
+PARAMS_INDEX = "signature_params.json"
+
+def load_params_index(output_dir):
+    try:
+        with open(os.path.join(output_dir, PARAMS_INDEX)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_params_index(output_dir, index):
+    path = os.path.join(output_dir, PARAMS_INDEX)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def is_up_to_date(input_file, output_file, params, index):
+    """
+    True if output_file exists, is newer than input_file and was extracted
+    with the same parameters (params_key recorded in index).
+    """
+    return (os.path.exists(output_file) and os.path.getmtime(output_file) >= os.path.getmtime(input_file)
+            and index.get(os.path.basename(output_file)) == params)
+
+def extract_file(input_file, output_file, stream=False, cache=None, **params):
+    """
+    Worker: compute the signature of one file, going through cache if given.
+
+    The output is written to a temporary file and renamed at the end, so an
+    interrupted run never leaves a partial .freqs that looks up to date.
+    """
+    start = time.perf_counter()
+    duration = sf.info(input_file).duration
+    tmp_file = output_file + ".tmp"
+    hit = False
+
+    if cache is not None:
+        signatures, hit = cache.get_or_compute(input_file, stream=stream, **params)
+        write_signature_to_file(signatures, tmp_file)
+    elif stream:
+        stream_signature_to_file(input_file, tmp_file, **params)
+    else:
+        write_signature_to_file(get_max_freqs(input_file, **params), tmp_file)
+    os.replace(tmp_file, output_file)
+
+    return duration, time.perf_counter() - start, hit
+
+def process_folder(input_dir, output_dir, workers=None, stream=False, force=False, cache=None, **params):
+    """
+    Build <output_dir>/<name>.freqs for every .wav of input_dir using a process pool.
+
+    params are the get_max_freqs extraction parameters (ws, sh, ds, nf). With
+    a SignatureCache, unchanged audio is never extracted twice for the same
+    parameters, even when the output folder is new. Outputs are skipped
+    only if they are newer than their .wav and were extracted with the same
+    parameters, as recorded in the PARAMS_INDEX of output_dir.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    index = load_params_index(output_dir)
+    params_id = params_key(**{**DEFAULT_PARAMS, **params})
+
+    jobs = []
+    skipped = 0
+    for filename in sorted(os.listdir(input_dir)):
+        if not filename.lower().endswith(".wav"):
+            continue
+        input_file = os.path.join(input_dir, filename)
+        output_file = os.path.join(output_dir, os.path.splitext(filename)[0] + ".freqs")
+        if not force and is_up_to_date(input_file, output_file, params_id, index):
+            skipped += 1
+            continue
+        jobs.append((input_file, output_file))
+
+    print(f"{len(jobs)} files to process, {skipped} up to date")
+    if not jobs:
+        return
+
+    total_audio = 0.0
+    failed = 0
+    hits = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(extract_file, input_file, output_file, stream, cache, **params): input_file
+            for input_file, output_file in jobs
+        }
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                duration, elapsed, hit = future.result()
+            except Exception as e:
+                failed += 1
+                index.pop(os.path.splitext(name)[0] + ".freqs", None)
+                print(f"Failed to process {name}: {e}")
+                continue
+            index[os.path.splitext(name)[0] + ".freqs"] = params_id
+            total_audio += duration
+            hits += hit
+            print(f"Processed {name}: {duration:.1f}s of audio in {elapsed:.2f}s "
+                  f"({duration / elapsed:.1f}x real time){' [cached]' if hit else ''}")
+
+    save_params_index(output_dir, index)
+    elapsed = time.perf_counter() - start
+    done = len(jobs) - failed
+    print(f"\n{done} files ({total_audio:.1f}s of audio) in {elapsed:.2f}s: "
+          f"{done / elapsed:.2f} files/s, {total_audio / elapsed:.1f}x real time")
+    if cache is not None:
+        print(f"{hits} cache hits, {cache.evict()} entries evicted")
+    if failed:
+        print(f"{failed} files failed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the .freqs signatures of every .wav in a folder.")
+    parser.add_argument("input_dir", help="folder with the .wav files")
+    parser.add_argument("output_dir", help="folder where the .freqs files are written")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--stream", action="store_true", help="use the bounded-memory streaming extractor")
+    parser.add_argument("--force", action="store_true", help="recompute files whose output is up to date")
+    parser.add_argument("--cache-dir", default=None, help="signature cache folder (disabled by default)")
+    parser.add_argument("--cache-size", type=int, default=2048, help="signature cache size limit in MB")
+    parser.add_argument("--ws", type=int, default=1024, help="window size")
+    parser.add_argument("--sh", type=int, default=256, help="window shift")
+    parser.add_argument("--ds", type=int, default=4, help="downsampling factor")
+    parser.add_argument("--nf", type=int, default=4, help="number of frequencies per window")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Input folder '{args.input_dir}' does not exist.")
+        sys.exit(1)
+
+    cache = None
+    if args.cache_dir:
+        cache = SignatureCache(args.cache_dir, args.cache_size * 1024**2)
+
+    process_folder(args.input_dir, args.output_dir, args.workers, args.stream, args.force, cache,
+                   ws=args.ws, sh=args.sh, ds=args.ds, nf=args.nf)
@@ -1,5 +1,10 @@
 from pydub import AudioSegment
 import os
+import soundfile as sf
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from get_max_freqs import mono_downsample, signatures_from_signal, write_signature_to_file
+from segments import fixed_segments
 
 def create_fixed_segments(input_file, output_dir, num_segments, segment_duration_sec):
     audio = AudioSegment.from_file(input_file)
@@ -26,17 +31,64 @@ def create_fixed_segments(input_file, output_dir, num_segments, segment_duration
         segment.export(output_filename, format="wav")
         print(f"Exported: {output_filename}")
 
-def process_folder(folder_path, output_dir, num_segments, segment_duration_sec):
+def create_fixed_segments_fast(input_file, output_dir, num_segments, segment_duration_sec, signatures=False):
+    """
+    Fast path of create_fixed_segments.
+
+    The file is decoded once into a NumPy buffer with soundfile and the
+    segments are cut at sample offsets (see fixed_segments) and written
+    directly with the sample encoding of the source. With signatures=True
+    the segments are handed straight to the signature extraction and
+    <name>_segment<i>.freqs files are written instead of WAVs.
+    Falls back to pydub for formats soundfile cannot decode.
+    """
+    try:
+        audio, sample_rate = sf.read(input_file, always_2d=True)
+    except sf.LibsndfileError:
+        if signatures:
+            raise
+        return create_fixed_segments(input_file, output_dir, num_segments, segment_duration_sec)
+
+    subtype = sf.info(input_file).subtype
+    if not sf.check_format('WAV', subtype):
+        subtype = 'PCM_16'
+
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+
+    for index, segment in fixed_segments(audio, sample_rate, num_segments, segment_duration_sec):
+        if signatures:
+            output_filename = os.path.join(output_dir, f"{base_name}_segment{index}.freqs")
+            mono_down = mono_downsample(segment, sample_rate)
+            write_signature_to_file(signatures_from_signal(mono_down), output_filename)
+        else:
+            output_filename = os.path.join(output_dir, f"{base_name}_segment{index}.wav")
+            sf.write(output_filename, segment, sample_rate, subtype=subtype)
+        print(f"Exported: {output_filename}")
+
+def process_folder(folder_path, output_dir, num_segments, segment_duration_sec,
+                   workers=None, fast=True, signatures=False):
+    """Segment every audio file of folder_path, one file per process."""
     os.makedirs(output_dir, exist_ok=True)
     supported_exts = ('.wav', '.mp3', '.flac', '.ogg')
 
-    for filename in os.listdir(folder_path):
-        if filename.lower().endswith(supported_exts):
-            file_path = os.path.join(folder_path, filename)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for filename in sorted(os.listdir(folder_path)):
+            if filename.lower().endswith(supported_exts):
+                file_path = os.path.join(folder_path, filename)
+                if fast:
+                    future = executor.submit(create_fixed_segments_fast, file_path, output_dir,
+                                             num_segments, segment_duration_sec, signatures)
+                else:
+                    future = executor.submit(create_fixed_segments, file_path, output_dir,
+                                             num_segments, segment_duration_sec)
+                futures[future] = filename
+
+        for future in as_completed(futures):
             try:
-                create_fixed_segments(file_path, output_dir, num_segments, segment_duration_sec)
+                future.result()
             except Exception as e:
-                print(f"Failed to process {filename}: {e}")
+                print(f"Failed to process {futures[future]}: {e}")
 
 # Example usage
 if __name__ == "__main__":
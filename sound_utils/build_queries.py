@@ -0,0 +1,165 @@
+import io
+import os
+import sys
+import time
+import zlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import soundfile as sf
+
+from get_max_freqs import mono_downsample, signatures_from_signal, write_signature_to_file
+from noise_engine import NOISE_TYPES, generate_noise, mix_noise
+from segments import fixed_segments
+from signature_cache import SignatureCache
+
+def pcm_roundtrip(audio, sample_rate, subtype):
+    """
+    Quantize audio exactly as writing it to a WAV of the given subtype and
+    reading it back would, without touching the disk.
+    """
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, subtype=subtype, format='WAV')
+    buffer.seek(0)
+    return sf.read(buffer)[0]
+
+def query_signature(audio, sample_rate, subtype=None, ws=1024, sh=256, ds=4, nf=4):
+    """Signature of an in-memory clip, as get_max_freqs would compute it from its WAV file."""
+    if subtype is not None:
+        audio = pcm_roundtrip(audio, sample_rate, subtype)
+    return signatures_from_signal(mono_downsample(audio, sample_rate, ds), ws, sh, nf)
+
+def song_clips(audio, sample_rate, base_name, num_segments, segment_duration_sec,
+               intensities, noise_types, seed=None, subtype=None):
+    """
+    Yield (query name, noisy clip) of every segment x noise type x intensity
+    of a decoded song. Each noise type is synthesized once per segment and
+    mixed at every intensity; with a subtype, the clips go through the PCM
+    quantization of a WAV of that subtype.
+    """
+    if seed is None:
+        rng = np.random.default_rng()
+    else:
+        rng = np.random.default_rng((seed, zlib.crc32(base_name.encode())))
+
+    for index, segment in fixed_segments(audio, sample_rate, num_segments, segment_duration_sec):
+        for noise_type in noise_types:
+            noise = generate_noise(noise_type, len(segment), rng)
+            for intensity in intensities:
+                mixed = mix_noise(segment, noise, intensity)
+                if subtype is not None:
+                    mixed = pcm_roundtrip(mixed, sample_rate, subtype)
+                yield f"{base_name}_segment{index}_{noise_type}_intensity_{intensity}.freqs", mixed
+
+def build_song_queries(input_file, output_dir, num_segments, segment_duration_sec,
+                       intensities, noise_types, seed=None, quantize=True, cache=None, **params):
+    """
+    Worker: write the .freqs of every segment x noise type x intensity of one song.
+
+    The song is decoded once, the segments are sliced in memory and each
+    noise type is synthesized once per segment and mixed at every
+    intensity. Only the final signatures are written, named
+    <song>_segment<i>_<noise>_intensity_<value>.freqs as expected by
+    main.cpp and the plotting scripts. With quantize, every noisy clip goes
+    through the same PCM quantization as the WAV files of the disk-based
+    pipeline.
+
+    params are the get_max_freqs extraction parameters (ws, sh, ds, nf).
+    With a SignatureCache, the signature of every clip is looked up by a hash
+    of its samples and the parameters, so rebuilding the same queries (same
+    seed) skips the extraction. Returns (queries written, cache hits).
+    """
+    audio, sample_rate = sf.read(input_file, always_2d=True)
+    subtype = sf.info(input_file).subtype if quantize else None
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+
+    written = 0
+    hits = 0
+    for out_name, clip in song_clips(audio, sample_rate, base_name, num_segments, segment_duration_sec,
+                                     intensities, noise_types, seed, subtype):
+        if cache is not None:
+            signatures, hit = cache.get_or_compute_audio(clip, sample_rate, **params)
+            hits += hit
+        else:
+            signatures = query_signature(clip, sample_rate, **params)
+        write_signature_to_file(signatures, os.path.join(output_dir, out_name))
+        written += 1
+    return written, hits
+
+def process_folder(input_dir, output_dir, num_segments=10, segment_duration_sec=5,
+                   intensities=(0.05, 0.1, 0.15, 0.2, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50),
+                   noise_types=NOISE_TYPES, workers=None, seed=None, quantize=True, cache=None, **params):
+    """
+    Build the query signatures of every song of input_dir, one song per
+    process, with the extraction parameters params (ws, sh, ds, nf) and
+    through cache if given.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    songs = [
+        os.path.join(input_dir, filename)
+        for filename in sorted(os.listdir(input_dir))
+        if filename.lower().endswith(('.wav', '.flac', '.ogg'))
+    ]
+    if not songs:
+        print(f"No audio files found in {input_dir}")
+        return
+
+    total = 0
+    hits = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(build_song_queries, song, output_dir, num_segments, segment_duration_sec,
+                            intensities, noise_types, seed, quantize, cache, **params): song
+            for song in songs
+        }
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                written, song_hits = future.result()
+            except Exception as e:
+                print(f"Failed to process {name}: {e}")
+                continue
+            total += written
+            hits += song_hits
+            print(f"Processed {name}: {written} queries")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n{total} queries from {len(songs)} songs in {elapsed:.2f}s ({total / elapsed:.1f} queries/s)")
+    if cache is not None:
+        print(f"{hits} cache hits, {cache.evict()} entries evicted")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Segment songs, add noise and write the query .freqs files without intermediate WAVs.")
+    parser.add_argument("input_dir", help="folder with the songs")
+    parser.add_argument("output_dir", help="folder where the query .freqs files are written")
+    parser.add_argument("--segments", type=int, default=10, help="number of segments per song")
+    parser.add_argument("--length", type=float, default=5, help="segment duration in seconds")
+    parser.add_argument("--intensities", type=float, nargs="+",
+                        default=[0.05, 0.1, 0.15, 0.2, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50])
+    parser.add_argument("--noise-types", nargs="+", default=list(NOISE_TYPES), choices=NOISE_TYPES)
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible noise")
+    parser.add_argument("--no-quantize", action="store_true",
+                        help="skip the PCM quantization that the WAV-based pipeline applies")
+    parser.add_argument("--cache-dir", default=None, help="signature cache folder (disabled by default)")
+    parser.add_argument("--cache-size", type=int, default=2048, help="signature cache size limit in MB")
+    parser.add_argument("--ws", type=int, default=1024, help="window size")
+    parser.add_argument("--sh", type=int, default=256, help="window shift")
+    parser.add_argument("--ds", type=int, default=4, help="downsampling factor")
+    parser.add_argument("--nf", type=int, default=4, help="number of frequencies per window")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Input folder '{args.input_dir}' does not exist.")
+        sys.exit(1)
+
+    cache = None
+    if args.cache_dir:
+        cache = SignatureCache(args.cache_dir, args.cache_size * 1024**2)
+
+    process_folder(args.input_dir, args.output_dir, args.segments, args.length, args.intensities,
+                   args.noise_types, args.workers, args.seed, not args.no_quantize, cache,
+                   ws=args.ws, sh=args.sh, ds=args.ds, nf=args.nf)
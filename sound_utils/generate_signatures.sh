@@ -2,10 +2,7 @@
 
 directory="../wav_sounds"
 
-for wavfile in "$directory"/*.wav; do
-    filename=$(basename "$wavfile" .wav)
-    echo "Processing $filename.wav ..."
-    python3 get_max_freqs.py "$wavfile" "../database/$filename.freqs"
-done
+# Signatures are extracted in parallel; files whose .freqs is newer than the .wav and was extracted with the same parameters are skipped
+python3 batch_get_max_freqs.py "$directory" "../database" --cache-dir "../signature_cache"
 
 echo "All files processed."
@@ -1,25 +1,83 @@
+import os
 import sys
+import tempfile
 import numpy as np
 import soundfile as sf
+from scipy.fft import rfft
 from scipy.fftpack import fft
 
+def mono_downsample(audio, sr, ds=4):
+    """Return the mono, downsampled signal of a stereo 44.1 kHz array."""
+    if sr != 44100:
+        raise ValueError("Sample rate must be 44100 Hz.")
+    if audio.ndim != 2 or audio.shape[1] != 2:
+        raise ValueError("Only stereo audio is supported.")
+
+    return downsample(np.sum(audio, axis=1), ds)
+
+def downsample(mono, ds=4):
+    """Moving average of ds samples, keeping one sample out of ds."""
+    return np.convolve(mono, np.ones(ds)/ds, mode='valid')[::ds]
+
+def load_mono_down(filename, ds=4):
+    """Read a stereo 44.1 kHz file and return the mono, downsampled signal."""
+    audio, sr = sf.read(filename)
+    return mono_downsample(audio, sr, ds)
+
+def top_freqs(power, nf=4):
+    """
+    Select the nf most energetic bins of every row of a power matrix.
+
+    Rows are ordered by decreasing power and indices are clamped to 255 so
+    that each one fits in a single byte, exactly like the per-window loop.
+    """
+    top_indices = np.argpartition(-power, nf, axis=1)[:, :nf]
+    top_power = np.take_along_axis(power, top_indices, axis=1)
+    order = np.argsort(-top_power, axis=1, kind='stable')
+    top_indices_sorted = np.take_along_axis(top_indices, order, axis=1)
+    return np.minimum(top_indices_sorted, 255).astype(np.uint8)
+
+def frame_powers(mono_down, ws=1024, sh=256, batch_frames=4096):
+    """
+    Yield (first frame, power spectrum of the frames) of a downsampled
+    signal, batch_frames windows at a time.
+
+    Every window is a strided view of mono_down (no copy); each batch goes
+    through a single real FFT and keeps the first ws // 2 bins.
+    """
+    num_windows = (len(mono_down) - ws) // sh + 1
+    if num_windows <= 0:
+        return
+
+    frames = np.lib.stride_tricks.sliding_window_view(mono_down, ws)[::sh][:num_windows]
+    for start in range(0, num_windows, batch_frames):
+        batch = frames[start:start + batch_frames]
+        yield start, np.abs(rfft(batch, axis=1)[:, :ws // 2]) ** 2
+
+def num_frames(num_samples, ws=1024, sh=256):
+    return max(0, (num_samples - ws) // sh + 1)
+
+def signatures_from_signal(mono_down, ws=1024, sh=256, nf=4, batch_frames=4096):
+    """Compute the signatures of a downsampled signal in batches of frames (see frame_powers)."""
+    signatures = np.empty((num_frames(len(mono_down), ws, sh), nf), dtype=np.uint8)
+    for start, power in frame_powers(mono_down, ws, sh, batch_frames):
+        signatures[start:start + len(power)] = top_freqs(power, nf)
+    return signatures
+
 def get_max_freqs(
     filename,
     ws=1024,
     sh=256,
     ds=4,
-    nf=4
+    nf=4,
+    batched=True
 ):
-    audio, sr = sf.read(filename)
-
-    if sr != 44100:
-        raise ValueError("Sample rate must be 44100 Hz.")
-    if audio.ndim != 2 or audio.shape[1] != 2:
-        raise ValueError("Only stereo audio is supported.")
+    mono_down = load_mono_down(filename, ds)
 
-    mono = np.sum(audio, axis=1)
-    mono_down = np.convolve(mono, np.ones(ds)/ds, mode='valid')[::ds]
+    if batched:
+        return signatures_from_signal(mono_down, ws, sh, nf)
 
+    # Reference per-window implementation
     num_windows = (len(mono_down) - ws) // sh + 1
     signatures = []
 
@@ -39,15 +97,149 @@ def get_max_freqs(
 
     return signatures
 
+def iter_max_freqs(
+    filename,
+    ws=1024,
+    sh=256,
+    ds=4,
+    nf=4,
+    blocksize=262144
+):
+    """
+    Streaming version of get_max_freqs.
+
+    The file is read blocksize frames at a time and the signatures of every
+    complete window are yielded as soon as they are available. Only the
+    samples still needed by the next downsampling step and the next window
+    are carried between blocks, so memory depends on blocksize and not on
+    the length of the recording. The concatenated output is identical to
+    get_max_freqs.
+    """
+    info = sf.info(filename)
+    if info.samplerate != 44100:
+        raise ValueError("Sample rate must be 44100 Hz.")
+    if info.channels != 2:
+        raise ValueError("Only stereo audio is supported.")
+
+    pending_mono = np.empty(0)
+    pending_down = np.empty(0)
+
+    for block in sf.blocks(filename, blocksize=blocksize):
+        pending_mono = np.concatenate((pending_mono, np.sum(block, axis=1)))
+
+        # Downsample every complete group of ds samples
+        num_down = (len(pending_mono) - ds) // ds + 1
+        if num_down <= 0:
+            continue
+        used = pending_mono[:num_down * ds]
+        down = np.convolve(used, np.ones(ds)/ds, mode='valid')[::ds]
+        pending_mono = pending_mono[num_down * ds:]
+
+        # Emit every complete window and keep the overlap for the next block
+        pending_down = np.concatenate((pending_down, down))
+        signatures = signatures_from_signal(pending_down, ws, sh, nf)
+        if len(signatures):
+            pending_down = pending_down[len(signatures) * sh:]
+            yield signatures
+
 def write_signature_to_file(signatures, outfile):
     with open(outfile, "wb") as f:
-        for window in signatures:
-            for freq in window:
-                f.write(bytes([freq]))
+        np.asarray(signatures, dtype=np.uint8).tofile(f)
+
+def stream_signature_to_file(filename, outfile, blocksize=262144, **params):
+    """Extract signatures with iter_max_freqs, appending them to outfile as they are produced."""
+    with open(outfile, "wb") as f:
+        for signatures in iter_max_freqs(filename, blocksize=blocksize, **params):
+            signatures.tofile(f)
+
+def verify_directory(wav_dir, freqs_dir):
+    """
+    Regression check: recompute every <name>.wav of wav_dir with both the
+    batched and the per-window implementation and compare them byte by byte
+    with the existing <name>.freqs of freqs_dir (e.g. database/).
+    """
+    failures = 0
+    checked = 0
+
+    for filename in sorted(os.listdir(wav_dir)):
+        if not filename.lower().endswith(".wav"):
+            continue
+        freqs_path = os.path.join(freqs_dir, os.path.splitext(filename)[0] + ".freqs")
+        if not os.path.exists(freqs_path):
+            continue
+
+        wav_path = os.path.join(wav_dir, filename)
+        with open(freqs_path, "rb") as f:
+            expected = f.read()
+
+        batched = np.asarray(get_max_freqs(wav_path), dtype=np.uint8).tobytes()
+        reference = np.asarray(get_max_freqs(wav_path, batched=False), dtype=np.uint8).tobytes()
+
+        checked += 1
+        if batched == expected and reference == expected:
+            print(f"OK       {filename}")
+        else:
+            failures += 1
+            print(f"MISMATCH {filename} (batched={batched == expected}, reference={reference == expected})")
+
+    print(f"{checked - failures}/{checked} signatures identical")
+    return failures == 0
+
+def self_test():
+    """
+    Regression check that needs no audio: write synthetic stereo WAVs to a
+    temporary folder and compare the batched, per-window and streaming
+    extractions byte by byte. The cases cover a partial last batch of
+    frames, a signal that ends exactly on a window, one shorter than a
+    window and non-default parameters.
+    """
+    rng = np.random.default_rng(0)
+    ws, sh, ds = 1024, 256, 4
+    cases = [
+        ("partial last batch", ((4096 + 37 - 1) * sh + ws) * ds + 3, {}),
+        ("exactly one window", ws * ds, {}),
+        ("shorter than a window", ws * ds - 1, {}),
+        ("ws=512 sh=128 ds=2 nf=8", 50000, {'ws': 512, 'sh': 128, 'ds': 2, 'nf': 8}),
+    ]
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, num_samples, params in cases:
+            t = np.arange(num_samples) / 44100
+            tones = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.2 * np.sin(2 * np.pi * 1234.5 * t)
+            audio = np.stack([tones, np.roll(tones, 17)], axis=1) + 0.05 * rng.standard_normal((num_samples, 2))
+            wav_path = os.path.join(tmp_dir, "test.wav")
+            sf.write(wav_path, audio, 44100, subtype='PCM_16')
+
+            batched = np.asarray(get_max_freqs(wav_path, **params), dtype=np.uint8).tobytes()
+            reference = np.asarray(get_max_freqs(wav_path, batched=False, **params), dtype=np.uint8).tobytes()
+            streamed = b"".join(signatures.tobytes() for signatures in iter_max_freqs(wav_path, blocksize=65536, **params))
+
+            if batched == reference == streamed:
+                print(f"OK       {name} ({len(batched)} bytes)")
+            else:
+                failures += 1
+                print(f"MISMATCH {name} (batched={batched == reference}, streamed={streamed == reference})")
+
+    print(f"{len(cases) - failures}/{len(cases)} cases identical")
+    return failures == 0
 
 if __name__ == "__main__":
+    if len(sys.argv) == 2 and sys.argv[1] == "--self-test":
+        sys.exit(0 if self_test() else 1)
+
+    if len(sys.argv) == 4 and sys.argv[1] == "--verify":
+        sys.exit(0 if verify_directory(sys.argv[2], sys.argv[3]) else 1)
+
+    if len(sys.argv) == 4 and sys.argv[1] == "--stream":
+        stream_signature_to_file(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
     if len(sys.argv) != 3:
         print("Usage: python3 get_max_freqs.py <input_wav> <output_freqs>")
+        print("       python3 get_max_freqs.py --stream <input_wav> <output_freqs>")
+        print("       python3 get_max_freqs.py --verify <wav_dir> <freqs_dir>")
+        print("       python3 get_max_freqs.py --self-test")
         sys.exit(1)
 
     input_wav = sys.argv[1]
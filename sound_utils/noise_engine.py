@@ -0,0 +1,95 @@
+import numpy as np
+import soundfile as sf
+
+NOISE_TYPES = ('white', 'pink', 'brown')
+
+# Number of random rows of the Voss-McCartney pink noise generator (as in sox synth)
+PINK_ROWS = 16
+
+def white_noise(num_samples, rng):
+    """Uniform white noise in [-1, 1), like `sox synth whitenoise`."""
+    return rng.uniform(-1.0, 1.0, num_samples)
+
+def pink_noise(num_samples, rng, rows=PINK_ROWS):
+    """
+    Voss-McCartney pink noise, like `sox synth pinknoise`.
+
+    Row k of the generator is refreshed every 2**(k+1) samples (when the
+    sample counter has k trailing zeros), so each row is a piecewise
+    constant array built with np.repeat instead of a per-sample loop.
+    """
+    total = white_noise(num_samples, rng)
+    for k in range(rows):
+        period = 2 ** (k + 1)
+        offset = 2 ** k
+        # Values held from sample offset + j*period until the next refresh
+        num_values = (num_samples - offset + period - 1) // period + 1 if num_samples > offset else 1
+        values = rng.uniform(-1.0, 1.0, num_values)
+        lengths = np.full(num_values, period)
+        lengths[0] = min(offset, num_samples)
+        total += np.repeat(values, lengths)[:num_samples]
+    return total / (rows + 1)
+
+def brown_noise(num_samples, rng):
+    """
+    Brownian noise, like `sox synth brownnoise`.
+
+    sox takes steps of uniform noise / 16 and rejects those that would
+    leave [-1, 1]; here the random walk is computed with a cumulative sum
+    and reflected at the boundaries, which keeps the same spectrum.
+    """
+    walk = np.cumsum(white_noise(num_samples, rng) / 16)
+    folded = np.mod(walk + 1.0, 4.0)
+    return np.where(folded < 2.0, folded - 1.0, 3.0 - folded)
+
+def generate_noise(noise_type, num_samples, rng=None):
+    """Generate num_samples of 'white', 'pink' or 'brown' noise."""
+    if rng is None:
+        rng = np.random.default_rng()
+    if noise_type == 'white':
+        return white_noise(num_samples, rng)
+    if noise_type == 'pink':
+        return pink_noise(num_samples, rng)
+    if noise_type == 'brown':
+        return brown_noise(num_samples, rng)
+    raise ValueError(f"Unsupported noise type: {noise_type}")
+
+def snr_to_volume(snr_db):
+    """SNR(dB) = 20*log10(signal/noise), so noise_volume = 10^(-SNR/20)."""
+    return 10**(-snr_db/20)
+
+def mix_noise(audio, noise, volume):
+    """
+    Mix noise into audio with `sox -m <input> -v <volume> <noise>` semantics.
+
+    Because -v is given, sox does not rescale the inputs by 1/n: the input
+    is kept at unit gain, the noise is scaled by volume and the sum is
+    clipped to full scale. `sox -n synth` produces a single channel and
+    sox -m only adds it to the first channel of a multichannel input;
+    noise with one column per channel is added to every channel.
+    """
+    mixed = audio.copy()
+    if noise.ndim == 1:
+        mixed[:, 0] += volume * noise
+    else:
+        mixed += volume * noise
+    return np.clip(mixed, -1.0, 1.0, out=mixed)
+
+def add_noise_levels(input_file, outputs, noise_type, rng=None, noise_channels=1):
+    """
+    Add one noise type to input_file at several levels in a single pass.
+
+    The file is decoded once and a single noise signal is generated, then
+    mixed at every (output_file, volume) pair of outputs. Outputs keep the
+    sample rate and encoding of the input.
+    """
+    audio, sample_rate = sf.read(input_file, always_2d=True)
+    subtype = sf.info(input_file).subtype
+
+    if noise_channels == 1:
+        noise = generate_noise(noise_type, len(audio), rng)
+    else:
+        noise = np.column_stack([generate_noise(noise_type, len(audio), rng) for _ in range(audio.shape[1])])
+
+    for output_file, volume in outputs:
+        sf.write(output_file, mix_noise(audio, noise, volume), sample_rate, subtype=subtype)
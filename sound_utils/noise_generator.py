@@ -1,7 +1,13 @@
 import os
+import sys
+import json
+import tempfile
 import subprocess
 import shutil
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from noise_engine import add_noise_levels, snr_to_volume
 
 def check_sox_installation():
     """Check if SoX is installed and available."""
@@ -29,7 +35,7 @@ def get_audio_info(input_file):
         print(f"Error getting audio info: {e}")
         return None
 
-def add_noise_with_sox(input_file, output_file, noise_type, snr_db=None, intensity=None):
+def add_noise_with_sox(input_file, output_file, noise_type, snr_db=None, intensity=None, scratch_dir=None):
     """
     Add noise to audio file using SoX.
     
@@ -39,6 +45,7 @@ def add_noise_with_sox(input_file, output_file, noise_type, snr_db=None, intensi
         noise_type: 'white', 'pink', or 'brown'
         snr_db: Signal-to-noise ratio in dB (if using SNR method)
         intensity: Noise intensity factor (if using intensity method)
+        scratch_dir: Folder for the temporary noise file (system temp folder by default)
     """
     temp_noise = None
     try:
@@ -66,8 +73,9 @@ def add_noise_with_sox(input_file, output_file, noise_type, snr_db=None, intensi
             
         sample_rate = int(rate_result.stdout.strip())
         
-        # Create temporary noise file
-        temp_noise = f"temp_noise_{noise_type}.wav"
+        # Create temporary noise file (unique name, so concurrent runs don't collide)
+        fd, temp_noise = tempfile.mkstemp(prefix=f"temp_noise_{noise_type}_", suffix=".wav", dir=scratch_dir)
+        os.close(fd)
         
         # Generate noise based on type - FIXED COMMAND STRUCTURE
         if noise_type == 'white':
@@ -90,6 +98,7 @@ def add_noise_with_sox(input_file, output_file, noise_type, snr_db=None, intensi
             ]
         else:
             print(f"Unsupported noise type: {noise_type}")
+            os.remove(temp_noise)
             return False
         
         # Generate noise
@@ -143,12 +152,51 @@ def add_noise_with_sox(input_file, output_file, noise_type, snr_db=None, intensi
             os.remove(temp_noise)
         return False
 
+def add_noise_with_numpy(input_file, outputs, noise_type):
+    """
+    Add noise in-process at several levels (see noise_engine.add_noise_levels).
+
+    Args:
+        input_file: Path to input audio file
+        outputs: List of (output_file, noise_volume) pairs
+        noise_type: 'white', 'pink', or 'brown'
+    """
+    try:
+        add_noise_levels(input_file, outputs, noise_type)
+        return True
+    except Exception as e:
+        print(f"Error processing {input_file}: {e}")
+        return False
+
+def add_noise_variants(input_file, outputs, noise_type, level_type, backend='numpy', scratch_dir=None):
+    """
+    Write every (output_file, level) pair of outputs for one noise type.
+
+    level_type is 'snr' (level in dB) or 'intensity' (noise volume). The
+    numpy backend decodes the file and synthesizes the noise once for all
+    levels; the sox backend is kept as a reference and runs
+    add_noise_with_sox once per level. Returns one success flag per output.
+    """
+    if backend == 'sox':
+        if level_type == 'snr':
+            return [add_noise_with_sox(input_file, out, noise_type, snr_db=level, scratch_dir=scratch_dir)
+                    for out, level in outputs]
+        return [add_noise_with_sox(input_file, out, noise_type, intensity=level, scratch_dir=scratch_dir)
+                for out, level in outputs]
+
+    if level_type == 'snr':
+        volumes = [(out, snr_to_volume(level)) for out, level in outputs]
+    else:
+        volumes = list(outputs)
+    return [add_noise_with_numpy(input_file, volumes, noise_type)] * len(outputs)
+
 def process_directory_snr(input_dir, output_dir, 
                          snr_values=[20, 15, 10, 5, 0, -5], 
-                         noise_types=['white', 'pink', 'brown']):
-    """Process directory using SNR-based noise addition with SoX."""
+                         noise_types=['white', 'pink', 'brown'],
+                         backend='numpy'):
+    """Process directory using SNR-based noise addition (numpy engine or SoX)."""
     
-    if not check_sox_installation():
+    if backend == 'sox' and not check_sox_installation():
         return
     
     # Create output directory
@@ -172,7 +220,7 @@ def process_directory_snr(input_dir, output_dir,
         print(f"\nProcessing {audio_file.name}...")
         
         # Get and display audio info
-        info = get_audio_info(str(audio_file))
+        info = get_audio_info(str(audio_file)) if backend == 'sox' else None
         if info:
             print("Audio info:")
             for line in info.split('\n')[:3]:  # Show first 3 lines
@@ -180,21 +228,19 @@ def process_directory_snr(input_dir, output_dir,
                     print(f"  {line}")
         
         for noise_type in noise_types:
+            # Create output filenames
+            stem = audio_file.stem
+            outputs = []
             for snr_db in snr_values:
-                # Create output filename
-                stem = audio_file.stem
                 out_name = f"{stem}_{noise_type}_snr_{snr_db}dB.wav"
-                out_path = Path(output_dir) / out_name
-                
-                print(f"  Adding {noise_type} noise at {snr_db}dB SNR...")
-                
-                success = add_noise_with_sox(
-                    str(audio_file), 
-                    str(out_path), 
-                    noise_type, 
-                    snr_db=snr_db
-                )
-                
+                outputs.append((str(Path(output_dir) / out_name), snr_db))
+            
+            print(f"  Adding {noise_type} noise at {len(outputs)} levels...")
+            
+            results = add_noise_variants(str(audio_file), outputs, noise_type, 'snr', backend)
+            
+            for (out_path, _), success in zip(outputs, results):
+                out_name = Path(out_path).name
                 if success:
                     print(f"    ✓ Saved {out_name}")
                 else:
@@ -202,10 +248,11 @@ def process_directory_snr(input_dir, output_dir,
 
 def process_directory_intensity(input_dir, output_dir, 
                               intensities=[0.05, 0.1, 0.15, 0.2, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50], 
-                              noise_types=['white', 'pink', 'brown']):
-    """Process directory using intensity-based noise addition with SoX."""
+                              noise_types=['white', 'pink', 'brown'],
+                              backend='numpy'):
+    """Process directory using intensity-based noise addition (numpy engine or SoX)."""
     
-    if not check_sox_installation():
+    if backend == 'sox' and not check_sox_installation():
         return
     
     # Create output directory
@@ -229,7 +276,7 @@ def process_directory_intensity(input_dir, output_dir,
         print(f"\nProcessing {audio_file.name}...")
         
         # Get and display audio info
-        info = get_audio_info(str(audio_file))
+        info = get_audio_info(str(audio_file)) if backend == 'sox' else None
         if info:
             print("Audio info:")
             for line in info.split('\n')[:3]:  # Show first 3 lines
@@ -237,30 +284,118 @@ def process_directory_intensity(input_dir, output_dir,
                     print(f"  {line}")
         
         for noise_type in noise_types:
+            # Create output filenames
+            stem = audio_file.stem
+            outputs = []
             for intensity in intensities:
-                # Create output filename
-                stem = audio_file.stem
                 out_name = f"{stem}_{noise_type}_intensity_{intensity}.wav"
-                out_path = Path(output_dir) / out_name
-                
-                print(f"  Adding {noise_type} noise at {intensity} intensity...")
-                
-                success = add_noise_with_sox(
-                    str(audio_file), 
-                    str(out_path), 
-                    noise_type, 
-                    intensity=intensity
-                )
-                
+                outputs.append((str(Path(output_dir) / out_name), intensity))
+            
+            print(f"  Adding {noise_type} noise at {len(outputs)} levels...")
+            
+            results = add_noise_variants(str(audio_file), outputs, noise_type, 'intensity', backend)
+            
+            for (out_path, _), success in zip(outputs, results):
+                out_name = Path(out_path).name
                 if success:
                     print(f"    ✓ Saved {out_name}")
                 else:
                     print(f"    ✗ Failed to create {out_name}")
 
-def process_single_file(input_file, output_dir, noise_type='white', snr_db=10):
+def list_audio_files(input_dir):
+    """All audio files of input_dir, sorted."""
+    audio_extensions = ['.wav', '.mp3', '.flac', '.m4a', '.aiff', '.au']
+    audio_files = set()
+    for ext in audio_extensions:
+        audio_files.update(Path(input_dir).glob(f"*{ext}"))
+        audio_files.update(Path(input_dir).glob(f"*{ext.upper()}"))
+    return sorted(audio_files)
+
+def load_manifest(manifest_path):
+    """Set of output files already recorded as done in the manifest."""
+    done = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["output"])
+                except (ValueError, KeyError):
+                    continue  # partially written last line of an interrupted run
+    return done
+
+def augment_task(input_file, outputs, noise_type, level_type, backend):
+    """Worker: write all outputs of one (file, noise type) using a private scratch folder."""
+    with tempfile.TemporaryDirectory(prefix="noise_worker_") as scratch_dir:
+        results = add_noise_variants(input_file, outputs, noise_type, level_type, backend, scratch_dir)
+    return list(zip(outputs, results))
+
+def process_directory_parallel(input_dir, output_dir, levels, level_type='intensity',
+                               noise_types=['white', 'pink', 'brown'], backend='numpy',
+                               workers=None, manifest_name="augment_manifest.jsonl"):
+    """
+    Spread the file x noise type x level grid across a process pool.
+
+    Every (file, noise type) pair is one task that writes all its levels.
+    Finished outputs are appended to a JSON-lines manifest in output_dir;
+    when the run is restarted, outputs already in the manifest (and still
+    on disk) are skipped, so an interrupted run continues where it stopped.
+    """
+    if backend == 'sox' and not check_sox_installation():
+        return
+    
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    manifest_path = os.path.join(output_dir, manifest_name)
+    done = load_manifest(manifest_path)
+    
+    audio_files = list_audio_files(input_dir)
+    if not audio_files:
+        print(f"No audio files found in {input_dir}")
+        return
+    
+    tasks = []
+    skipped = 0
+    for audio_file in audio_files:
+        for noise_type in noise_types:
+            outputs = []
+            for level in levels:
+                if level_type == 'snr':
+                    out_name = f"{audio_file.stem}_{noise_type}_snr_{level}dB.wav"
+                else:
+                    out_name = f"{audio_file.stem}_{noise_type}_intensity_{level}.wav"
+                out_path = str(Path(output_dir) / out_name)
+                if out_path in done and os.path.exists(out_path):
+                    skipped += 1
+                else:
+                    outputs.append((out_path, level))
+            if outputs:
+                tasks.append((str(audio_file), outputs, noise_type))
+    
+    print(f"Found {len(audio_files)} audio files: {sum(len(t[1]) for t in tasks)} outputs to create, {skipped} already done")
+    
+    failed = 0
+    with open(manifest_path, "a") as manifest, ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(augment_task, input_file, outputs, noise_type, level_type, backend)
+            for input_file, outputs, noise_type in tasks
+        ]
+        for future in as_completed(futures):
+            for (out_path, level), success in future.result():
+                out_name = Path(out_path).name
+                if success:
+                    manifest.write(json.dumps({"output": out_path, "level": level}) + "\n")
+                    print(f"    ✓ Saved {out_name}")
+                else:
+                    failed += 1
+                    print(f"    ✗ Failed to create {out_name}")
+            manifest.flush()
+    
+    if failed:
+        print(f"{failed} outputs failed; run again to retry them")
+
+def process_single_file(input_file, output_dir, noise_type='white', snr_db=10, backend='numpy'):
     """Process a single file for testing."""
     
-    if not check_sox_installation():
+    if backend == 'sox' and not check_sox_installation():
         return
     
     Path(output_dir).mkdir(parents=True, exist_ok=True)
@@ -271,7 +406,7 @@ def process_single_file(input_file, output_dir, noise_type='white', snr_db=10):
     
     print(f"Processing {input_path.name} with {noise_type} noise at {snr_db}dB SNR...")
     
-    success = add_noise_with_sox(str(input_path), str(out_path), noise_type, snr_db=snr_db)
+    success = add_noise_variants(str(input_path), [(str(out_path), snr_db)], noise_type, 'snr', backend)[0]
     
     if success:
         print(f"✓ Saved {out_name}")
@@ -289,19 +424,33 @@ if __name__ == "__main__":
         print("Please update the input_folder path or create the directory.")
         exit(1)
     
-    print("SoX Audio Noise Addition Script")
+    # In-process numpy noise engine by default, SoX as reference with --sox
+    backend = 'sox' if '--sox' in sys.argv else 'numpy'
+    # Spread the work across all cores (resumable) with --parallel
+    parallel = '--parallel' in sys.argv
+    
+    print("Audio Noise Addition Script")
+    print(f"Backend: {backend}")
     print("=" * 40)
     
     # Choose processing method
     method = input("\nChoose method:\n1. SNR-based (recommended)\n2. Intensity-based\n3. Test single file\nEnter choice (1-3): ").strip()
     
     if method == "1":
-        print("\nUsing SNR-based noise addition with SoX...")
-        process_directory_snr(input_folder, output_folder)
+        print("\nUsing SNR-based noise addition...")
+        if parallel:
+            process_directory_parallel(input_folder, output_folder, [20, 15, 10, 5, 0, -5], 'snr', backend=backend)
+        else:
+            process_directory_snr(input_folder, output_folder, backend=backend)
         
     elif method == "2":
-        print("\nUsing intensity-based noise addition with SoX...")
-        process_directory_intensity(input_folder, output_folder)
+        print("\nUsing intensity-based noise addition...")
+        if parallel:
+            process_directory_parallel(input_folder, output_folder,
+                                       [0.05, 0.1, 0.15, 0.2, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50],
+                                       'intensity', backend=backend)
+        else:
+            process_directory_intensity(input_folder, output_folder, backend=backend)
         
     elif method == "3":
         # Test with a single file
@@ -309,7 +458,7 @@ if __name__ == "__main__":
         if test_files:
             test_file = test_files[0]
             print(f"\nTesting with {test_file.name}...")
-            process_single_file(str(test_file), output_folder + "_test")
+            process_single_file(str(test_file), output_folder + "_test", backend=backend)
         else:
             print("No .wav files found for testing")
     
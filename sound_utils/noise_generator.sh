@@ -4,7 +4,7 @@
 # This script will choose option 2 (intensity-based) automatically
 
 echo "=========================================="
-echo "SoX Audio Noise Addition - Intensity Mode"
+echo "Audio Noise Addition - Intensity Mode"
 echo "=========================================="
 echo ""
 
@@ -36,7 +36,7 @@ echo "Running intensity-based noise addition..."
 echo ""
 
 # Run the Python script and automatically choose option 2
-echo "2" | $PYTHON_CMD "$PYTHON_SCRIPT"
+echo "2" | $PYTHON_CMD "$PYTHON_SCRIPT" "$@"
 
 # Check the exit status
 if [ $? -eq 0 ]; then
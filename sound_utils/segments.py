@@ -0,0 +1,24 @@
+import numpy as np
+
+def fixed_segments(audio, sample_rate, num_segments, segment_duration_sec):
+    """
+    Sample-accurate version of the segmentation done by
+    batch_segment_audio.create_fixed_segments (pydub).
+
+    Yields (index, segment) for num_segments windows of segment_duration_sec
+    evenly distributed over audio (frames x channels). Segments are views of
+    audio; only the last ones are copied when they need silence padding.
+    """
+    total_samples = len(audio)
+    segment_samples = int(round(segment_duration_sec * sample_rate))
+    step = (total_samples - segment_samples) / (num_segments - 1) if num_segments > 1 else 0
+
+    for i in range(num_segments):
+        start = max(int(i * step), 0)
+        end = start + segment_samples
+        segment = audio[start:end]
+        if end > total_samples:
+            # Padding with silence if needed
+            padding = np.zeros((end - max(start, total_samples),) + audio.shape[1:], dtype=audio.dtype)
+            segment = np.concatenate((segment, padding))
+        yield i + 1, segment
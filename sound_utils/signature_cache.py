@@ -0,0 +1,134 @@
+import os
+import hashlib
+import numpy as np
+
+from get_max_freqs import get_max_freqs, iter_max_freqs, mono_downsample, signatures_from_signal
+
+# Bump when the extraction algorithm changes so that old entries stop matching
+SIGNATURE_VERSION = 1
+
+DEFAULT_PARAMS = {'ws': 1024, 'sh': 256, 'ds': 4, 'nf': 4}
+
+def params_key(ws=1024, sh=256, ds=4, nf=4):
+    """Extraction parameters and algorithm version as a string, e.g. v1:ws=1024:sh=256:ds=4:nf=4."""
+    return f"v{SIGNATURE_VERSION}:ws={ws}:sh={sh}:ds={ds}:nf={nf}"
+
+def hash_file(path, chunk_size=1 << 20):
+    """SHA-256 of the file content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_audio(audio, sample_rate):
+    """SHA-256 of decoded samples (shape, dtype and sample rate included)."""
+    audio = np.ascontiguousarray(audio)
+    digest = hashlib.sha256(f"{sample_rate}:{audio.shape}:{audio.dtype.str}:".encode())
+    digest.update(audio.data)
+    return digest.hexdigest()
+
+class SignatureCache:
+    """
+    On-disk cache of signatures keyed by the audio content and the extraction parameters.
+
+    Entries are stored as <cache_dir>/<key[:2]>/<key>.freqs. Every hit
+    refreshes the entry's modification time, and evict() removes the least
+    recently used entries until the cache fits in max_bytes.
+    """
+
+    def __init__(self, cache_dir="../signature_cache", max_bytes=2 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, audio_hash, ws=1024, sh=256, ds=4, nf=4):
+        return hashlib.sha256(f"{audio_hash}:{params_key(ws, sh, ds, nf)}".encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".freqs")
+
+    def get(self, key):
+        """Return the cached signature bytes, or None on a miss."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_or_compute(self, input_file, stream=False, audio_hash=None, **params):
+        """
+        Return (signatures, hit) for input_file, computing and storing them on a miss.
+
+        params are the get_max_freqs extraction parameters (ws, sh, ds, nf).
+        """
+        params = {**DEFAULT_PARAMS, **params}
+        if audio_hash is None:
+            audio_hash = hash_file(input_file)
+        key = self.key(audio_hash, **params)
+
+        data = self.get(key)
+        if data is not None:
+            return np.frombuffer(data, dtype=np.uint8).reshape(-1, params['nf']), True
+
+        if stream:
+            signatures = np.concatenate(
+                list(iter_max_freqs(input_file, **params)) or [np.empty((0, params['nf']), dtype=np.uint8)]
+            )
+        else:
+            signatures = get_max_freqs(input_file, **params)
+        self.put(key, signatures.tobytes())
+        return signatures, False
+
+    def get_or_compute_audio(self, audio, sample_rate, **params):
+        """
+        Return (signatures, hit) for decoded stereo audio that has no file of
+        its own (e.g. a noisy query clip), keyed by a hash of its samples.
+        """
+        params = {**DEFAULT_PARAMS, **params}
+        key = self.key(hash_audio(audio, sample_rate), **params)
+
+        data = self.get(key)
+        if data is not None:
+            return np.frombuffer(data, dtype=np.uint8).reshape(-1, params['nf']), True
+
+        signatures = signatures_from_signal(mono_downsample(audio, sample_rate, params['ds']),
+                                            params['ws'], params['sh'], params['nf'])
+        self.put(key, signatures.tobytes())
+        return signatures, False
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes. Returns the number removed."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".freqs"):
+                    continue
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
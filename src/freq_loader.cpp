@@ -1,7 +1,89 @@
 #include "freq_loader.hpp"
 #include <fstream>
+#include <cstring>
+#include <stdexcept>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+
+namespace {
+
+const char PACKED_MAGIC[8] = {'F', 'R', 'E', 'Q', 'S', 'D', 'B', '\0'};
+const uint32_t PACKED_VERSION = 1;
+const size_t HEADER_SIZE = 32;
+const size_t INDEX_ENTRY_SIZE = 32;
+
+template <typename T>
+T read_le(const uint8_t* p) {
+    T value;
+    std::memcpy(&value, p, sizeof(T));  // the format is little-endian, like every supported host
+    return value;
+}
+
+}
 
 std::vector<uint8_t> load_freq_file(const std::string& path) {
     std::ifstream file(path, std::ios::binary);
     return std::vector<uint8_t>((std::istreambuf_iterator<char>(file)), std::istreambuf_iterator<char>());
-}
\ No newline at end of file
+}
+
+bool is_packed_database(const std::string& path) {
+    std::ifstream file(path, std::ios::binary);
+    char magic[sizeof(PACKED_MAGIC)];
+    return file.read(magic, sizeof(magic)) && std::memcmp(magic, PACKED_MAGIC, sizeof(magic)) == 0;
+}
+
+void PackedDatabase::open(const std::string& path) {
+    int fd = ::open(path.c_str(), O_RDONLY);
+    if (fd < 0) throw std::runtime_error("Cannot open packed database: " + path);
+
+    struct stat st;
+    if (fstat(fd, &st) != 0 || static_cast<size_t>(st.st_size) < HEADER_SIZE) {
+        ::close(fd);
+        throw std::runtime_error("Invalid packed database: " + path);
+    }
+    length = st.st_size;
+    base = mmap(nullptr, length, PROT_READ, MAP_PRIVATE, fd, 0);
+    ::close(fd);
+    if (base == MAP_FAILED) {
+        base = nullptr;
+        throw std::runtime_error("Cannot map packed database: " + path);
+    }
+
+    const uint8_t* bytes = static_cast<const uint8_t*>(base);
+    if (std::memcmp(bytes, PACKED_MAGIC, sizeof(PACKED_MAGIC)) != 0 ||
+        read_le<uint32_t>(bytes + 8) != PACKED_VERSION) {
+        throw std::runtime_error("Unsupported packed database: " + path);
+    }
+
+    uint32_t count = read_le<uint32_t>(bytes + 12);
+    uint64_t names_offset = read_le<uint64_t>(bytes + 16);
+    uint64_t data_offset = read_le<uint64_t>(bytes + 24);
+    if (HEADER_SIZE + static_cast<uint64_t>(count) * INDEX_ENTRY_SIZE > length ||
+        names_offset > length || data_offset > length) {
+        throw std::runtime_error("Corrupted packed database: " + path);
+    }
+
+    views.clear();
+    views.reserve(count);
+    for (uint32_t i = 0; i < count; ++i) {
+        const uint8_t* entry = bytes + HEADER_SIZE + static_cast<size_t>(i) * INDEX_ENTRY_SIZE;
+        uint64_t name_start = names_offset + read_le<uint64_t>(entry);
+        uint32_t name_length = read_le<uint32_t>(entry + 8);
+        uint64_t data_start = data_offset + read_le<uint64_t>(entry + 16);
+        uint64_t data_length = read_le<uint64_t>(entry + 24);
+        if (name_start + name_length > length || data_start + data_length > length) {
+            throw std::runtime_error("Corrupted packed database: " + path);
+        }
+        views.push_back({
+            std::string(reinterpret_cast<const char*>(bytes + name_start), name_length),
+            bytes + data_start,
+            static_cast<size_t>(data_length)
+        });
+    }
+}
+
+PackedDatabase::~PackedDatabase() {
+    if (base != nullptr) munmap(base, length);
+}
@@ -4,7 +4,40 @@
 #include <vector>
 #include <string>
 #include <cstdint>
+#include <cstddef>
 
 std::vector<uint8_t> load_freq_file(const std::string& path);
 
-#endif
\ No newline at end of file
+// Non-owning view of one signature: a loaded .freqs file or an entry of a packed database
+struct FreqView {
+    std::string name;
+    const uint8_t* data;
+    size_t size;
+};
+
+// Packed signature database written by ncd_utils/freq_loader.py, mapped read-only with mmap.
+//
+// Layout (little-endian):
+//   header  magic "FREQSDB\0", uint32 version, uint32 count, uint64 names_offset, uint64 data_offset
+//   index   count x {uint64 name_offset, uint32 name_length, uint32 reserved, uint64 data_offset, uint64 data_length}
+//   names   UTF-8 file names, back to back (offsets relative to names_offset)
+//   data    signatures, back to back (offsets relative to data_offset)
+class PackedDatabase {
+public:
+    PackedDatabase() = default;
+    ~PackedDatabase();
+    PackedDatabase(const PackedDatabase&) = delete;
+    PackedDatabase& operator=(const PackedDatabase&) = delete;
+
+    void open(const std::string& path);
+    const std::vector<FreqView>& entries() const { return views; }
+
+private:
+    void* base = nullptr;
+    size_t length = 0;
+    std::vector<FreqView> views;
+};
+
+bool is_packed_database(const std::string& path);
+
+#endif
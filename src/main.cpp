@@ -21,23 +21,25 @@ struct GenreDatabase {
             if (genre_entry.is_directory()) {
                 std::string genre_name = genre_entry.path().filename().string();
                 
+                // Every .freqs file of the folder is a reference of the genre (e.g. one per song)
+                auto& references = genres[genre_name];
                 for (const auto& file_entry : fs::directory_iterator(genre_entry.path())) {
                     if (file_entry.path().extension() == ".freqs") {
-                        std::vector<uint8_t> data = load_freq_file(file_entry.path().string());
-                        genres[genre_name] = {
-                            std::make_pair(file_entry.path().filename().string(), std::move(data))
-                        };
-                        break;  // Only one .freqs file per folder
+                        references.emplace_back(file_entry.path().filename().string(),
+                                                load_freq_file(file_entry.path().string()));
                     }
                 }
+                std::sort(references.begin(), references.end());
             }
         }
     }
 };
 
+// Average NCD of every genre is stored in avg_scores when given, so callers do not recompute it
 std::string identify_genre(const std::vector<uint8_t>& query_data, 
                           const GenreDatabase& genre_db, 
-                          const std::string& compressor) {
+                          const std::string& compressor,
+                          std::map<std::string, double>* avg_scores = nullptr) {
     std::map<std::string, double> genre_scores;
     std::map<std::string, int> genre_counts;
     
@@ -50,7 +52,6 @@ std::string identify_genre(const std::vector<uint8_t>& query_data,
     // Compute NCD with all files in each genre
     for (const auto& [genre, files] : genre_db.genres) {
         for (const auto& [filename, file_data] : files) {
-            std::cout<<compressor<<std::endl;
             double ncd_value = compute_ncd(query_data, file_data, compressor);
             genre_scores[genre] += ncd_value;
             genre_counts[genre]++;
@@ -65,6 +66,9 @@ std::string identify_genre(const std::vector<uint8_t>& query_data,
         if (genre_counts[genre] > 0) {
             double avg_ncd = total_score / genre_counts[genre];
             std::cout << "Genre: " << genre << " - Average NCD: " << avg_ncd << std::endl;
+            if (avg_scores) {
+                (*avg_scores)[genre] = avg_ncd;
+            }
             
             if (avg_ncd < best_avg_ncd) {
                 best_avg_ncd = avg_ncd;
@@ -96,6 +100,9 @@ int main(int argc, char* argv[]) {
         } else if (strcmp(argv[i], "--output") == 0 && i + 1 < argc) {
             output_csv = argv[i + 1];
             ++i;
+        } else if (strcmp(argv[i], "--db") == 0 && i + 1 < argc) {
+            db_dir = argv[i + 1];
+            ++i;
         } else if (strcmp(argv[i], "--genre") == 0) {
             genre_mode = true;
         } else {
@@ -143,26 +150,14 @@ int main(int argc, char* argv[]) {
                     auto qdata = load_freq_file(qentry.path().string());
 
                     std::cout << "\nProcessing: " << qname << std::endl;
-                    std::string identified_genre = identify_genre(qdata, genre_db, compressor);
+                    std::map<std::string, double> avg_scores;
+                    std::string identified_genre = identify_genre(qdata, genre_db, compressor, &avg_scores);
 
                     // Calcular confiança (inverso da NCD média do género identificado)
                     double confidence = 0.0;
-                    double best_avg_ncd = std::numeric_limits<double>::max();
-
-                    for (const auto& [genre, files] : genre_db.genres) {
-                        double total_ncd = 0.0;
-                        for (const auto& [filename, file_data] : files) {
-                            total_ncd += compute_ncd(qdata, file_data, compressor);
-                        }
-                        if (!files.empty()) {
-                            double avg_ncd = total_ncd / files.size();
-                            if (genre == identified_genre) {
-                                confidence = 1.0 - avg_ncd;
-                            }
-                            if (avg_ncd < best_avg_ncd) {
-                                best_avg_ncd = avg_ncd;
-                            }
-                        }
+                    auto identified = avg_scores.find(identified_genre);
+                    if (identified != avg_scores.end()) {
+                        confidence = 1.0 - identified->second;
                     }
 
                     // Extrair género esperado do nome do ficheiro (antes do primeiro '_')
@@ -188,10 +183,21 @@ int main(int argc, char* argv[]) {
         
     } else {
         // Original music identification mode
-        std::vector<std::pair<std::string, std::vector<uint8_t>>> database;
-        for (const auto& entry : fs::directory_iterator(db_dir)) {
-            if (entry.path().extension() == ".freqs") {
-                database.emplace_back(entry.path().filename().string(), load_freq_file(entry.path().string()));
+        // --db is either a folder of .freqs files or a packed database file (mapped, no copies)
+        std::vector<std::pair<std::string, std::vector<uint8_t>>> loaded;
+        PackedDatabase packed;
+        std::vector<FreqView> database;
+        if (fs::is_regular_file(db_dir) && is_packed_database(db_dir)) {
+            packed.open(db_dir);
+            database = packed.entries();
+        } else {
+            for (const auto& entry : fs::directory_iterator(db_dir)) {
+                if (entry.path().extension() == ".freqs") {
+                    loaded.emplace_back(entry.path().filename().string(), load_freq_file(entry.path().string()));
+                }
+            }
+            for (const auto& [dname, ddata] : loaded) {
+                database.push_back({dname, ddata.data(), ddata.size()});
             }
         }
 
@@ -203,11 +209,11 @@ int main(int argc, char* argv[]) {
             std::string best_match;
             double best_ncd = std::numeric_limits<double>::max();
 
-            for (const auto& [dname, ddata] : database) {
-                double ncd_value = compute_ncd(qdata, ddata, compressor);
+            for (const auto& entry : database) {
+                double ncd_value = compute_ncd(qdata.data(), qdata.size(), entry.data, entry.size, compressor);
                 if (ncd_value < best_ncd) {
                     best_ncd = ncd_value;
-                    best_match = dname;
+                    best_match = entry.name;
                 }
             }
 
@@ -228,11 +234,11 @@ int main(int argc, char* argv[]) {
                     std::string best_match;
                     double best_ncd = std::numeric_limits<double>::max();
 
-                    for (const auto& [dname, ddata] : database) {
-                        double ncd_value = compute_ncd(qdata, ddata, compressor);
+                    for (const auto& entry : database) {
+                        double ncd_value = compute_ncd(qdata.data(), qdata.size(), entry.data, entry.size, compressor);
                         if (ncd_value < best_ncd) {
                             best_ncd = ncd_value;
-                            best_match = dname;
+                            best_match = entry.name;
                         }
                     }
 
@@ -1,13 +1,20 @@
 #include "ncd.hpp"
 #include "utils.hpp"
 
-double compute_ncd(const std::vector<uint8_t>& x, const std::vector<uint8_t>& y, const std::string& compressor_str) {
+double compute_ncd(const uint8_t* x, size_t x_size, const uint8_t* y, size_t y_size, const std::string& compressor_str) {
     Compressor compressor = compressor_from_string(compressor_str);
 
-    int Cx = compress_size(x, compressor);
-    int Cy = compress_size(y, compressor);
-    auto xy = concat_vectors(x, y);
+    int Cx = compress_size(x, x_size, compressor);
+    int Cy = compress_size(y, y_size, compressor);
+    std::vector<uint8_t> xy;
+    xy.reserve(x_size + y_size);
+    xy.insert(xy.end(), x, x + x_size);
+    xy.insert(xy.end(), y, y + y_size);
     int Cxy = compress_size(xy, compressor);
 
     return static_cast<double>(Cxy - std::min(Cx, Cy)) / std::max(Cx, Cy);
+}
+
+double compute_ncd(const std::vector<uint8_t>& x, const std::vector<uint8_t>& y, const std::string& compressor_str) {
+    return compute_ncd(x.data(), x.size(), y.data(), y.size(), compressor_str);
 }
\ No newline at end of file
@@ -3,9 +3,11 @@
 
 #include <vector>
 #include <cstdint>
+#include <cstddef>
 #include <string>
 #include "utils.hpp"
 
+double compute_ncd(const uint8_t* x, size_t x_size, const uint8_t* y, size_t y_size, const std::string& compressor_str);
 double compute_ncd(const std::vector<uint8_t>& x, const std::vector<uint8_t>& y, const std::string& compressor_str);
 
 #endif
\ No newline at end of file
@@ -10,74 +10,74 @@
 #include <stdexcept>
 #include <lz4.h>
 
-int compress_zlib(const std::vector<uint8_t>& data) {
-    uLongf compressedSize = compressBound(data.size());
+int compress_zlib(const uint8_t* data, size_t size) {
+    uLongf compressedSize = compressBound(size);
     std::vector<uint8_t> compressed(compressedSize);
-    compress(compressed.data(), &compressedSize, data.data(), data.size());
+    compress(compressed.data(), &compressedSize, data, size);
     return compressedSize;
 }
 
-int compress_bzip2(const std::vector<uint8_t>& data) {
-    unsigned int compressedSize = data.size() * 1.01 + 600;
+int compress_bzip2(const uint8_t* data, size_t size) {
+    unsigned int compressedSize = size * 1.01 + 600;
     std::vector<char> compressed(compressedSize);
     int ret = BZ2_bzBuffToBuffCompress(compressed.data(), &compressedSize,
-                                      reinterpret_cast<char*>(const_cast<uint8_t*>(data.data())),
-                                      data.size(), 9, 0, 30);
+                                      reinterpret_cast<char*>(const_cast<uint8_t*>(data)),
+                                      size, 9, 0, 30);
     if (ret != BZ_OK) throw std::runtime_error("BZIP2 compression failed");
     return compressedSize;
 }
 
-int compress_zstd(const std::vector<uint8_t>& data) {
-    size_t compressedSize = ZSTD_compressBound(data.size());
+int compress_zstd(const uint8_t* data, size_t size) {
+    size_t compressedSize = ZSTD_compressBound(size);
     std::vector<uint8_t> compressed(compressedSize);
-    size_t ret = ZSTD_compress(compressed.data(), compressedSize, data.data(), data.size(), 3);
+    size_t ret = ZSTD_compress(compressed.data(), compressedSize, data, size, 3);
     if (ZSTD_isError(ret)) throw std::runtime_error("ZSTD compression failed");
     return ret;
 }
 
-int compress_lzma(const std::vector<uint8_t>& data) {
+int compress_lzma(const uint8_t* data, size_t size) {
     size_t out_pos = 0;
-    size_t out_size = data.size() * 2;
+    size_t out_size = size * 2;
     std::vector<uint8_t> compressed(out_size);
     lzma_ret ret = lzma_easy_buffer_encode(6, LZMA_CHECK_CRC64, NULL,
-                                           data.data(), data.size(),
+                                           data, size,
                                            compressed.data(), &out_pos, out_size);
     if (ret != LZMA_OK) throw std::runtime_error("LZMA compression failed");
     return out_pos;
 }
 
-int compress_lzo(const std::vector<uint8_t>& data) {
+int compress_lzo(const uint8_t* data, size_t size) {
     static bool lzo_initialized = false;
     if (!lzo_initialized) {
         if (lzo_init() != LZO_E_OK) throw std::runtime_error("LZO initialization failed");
         lzo_initialized = true;
     }
-    std::vector<uint8_t> compressed(data.size() + data.size() / 16 + 64 + 3);
+    std::vector<uint8_t> compressed(size + size / 16 + 64 + 3);
     std::vector<uint8_t> wrkmem(LZO1X_1_MEM_COMPRESS);
     lzo_uint out_len;
-    int r = lzo1x_1_compress(data.data(), data.size(), compressed.data(), &out_len, wrkmem.data());
+    int r = lzo1x_1_compress(data, size, compressed.data(), &out_len, wrkmem.data());
     if (r != LZO_E_OK) throw std::runtime_error("LZO compression failed");
     return out_len;
 }
 
-int compress_snappy(const std::vector<uint8_t>& data) {
-    size_t max_len = snappy::MaxCompressedLength(data.size());
+int compress_snappy(const uint8_t* data, size_t size) {
+    size_t max_len = snappy::MaxCompressedLength(size);
     std::string output;
     output.resize(max_len);
     size_t out_len;
-    snappy::RawCompress(reinterpret_cast<const char*>(data.data()), data.size(), &output[0], &out_len);
+    snappy::RawCompress(reinterpret_cast<const char*>(data), size, &output[0], &out_len);
     if (out_len == 0) throw std::runtime_error("Snappy compression failed");
     return static_cast<int>(out_len);
 }
 
-int compress_lz4(const std::vector<uint8_t>& data) {
-    int max_dst_size = LZ4_compressBound(data.size());
+int compress_lz4(const uint8_t* data, size_t size) {
+    int max_dst_size = LZ4_compressBound(size);
     std::vector<char> compressed(max_dst_size);
 
     int compressed_size = LZ4_compress_default(
-        reinterpret_cast<const char*>(data.data()), 
+        reinterpret_cast<const char*>(data), 
         compressed.data(),                           
-        data.size(),                                 
+        size,                                        
         max_dst_size                               
     );
 
@@ -90,27 +90,31 @@ int compress_lz4(const std::vector<uint8_t>& data) {
 
 
 
-int compress_size(const std::vector<uint8_t>& data, Compressor compressor) {
+int compress_size(const uint8_t* data, size_t size, Compressor compressor) {
     switch (compressor) {
         case Compressor::ZLIB:
-            return compress_zlib(data);
+            return compress_zlib(data, size);
         case Compressor::BZIP2:
-            return compress_bzip2(data);
+            return compress_bzip2(data, size);
         case Compressor::ZSTD:
-            return compress_zstd(data);
+            return compress_zstd(data, size);
         case Compressor::LZMA:
-            return compress_lzma(data);
+            return compress_lzma(data, size);
         case Compressor::LZO:
-            return compress_lzo(data);
+            return compress_lzo(data, size);
         case Compressor::SNAPPY:
-            return compress_snappy(data);
+            return compress_snappy(data, size);
         case Compressor::LZ4:
-            return compress_lz4(data);
+            return compress_lz4(data, size);
         default:
             throw std::invalid_argument("Unknown compressor type");
     }
 }
 
+int compress_size(const std::vector<uint8_t>& data, Compressor compressor) {
+    return compress_size(data.data(), data.size(), compressor);
+}
+
 std::vector<uint8_t> concat_vectors(const std::vector<uint8_t>& a, const std::vector<uint8_t>& b) {
     std::vector<uint8_t> result = a;
     result.insert(result.end(), b.begin(), b.end());
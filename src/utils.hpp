@@ -3,6 +3,7 @@
 
 #include <vector>
 #include <cstdint>
+#include <cstddef>
 #include <string>
 
 enum class Compressor {
@@ -15,6 +16,7 @@ enum class Compressor {
     LZ4
 };
 
+int compress_size(const uint8_t* data, size_t size, Compressor compressor);
 int compress_size(const std::vector<uint8_t>& data, Compressor compressor);
 std::vector<uint8_t> concat_vectors(const std::vector<uint8_t>& a, const std::vector<uint8_t>& b);
 Compressor compressor_from_string(const std::string& str);